@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from tp1_pkg import bank, ligo
+from tp1_pkg.cache import StrainCache
+from tp1_pkg.psd import PSDProvider
+
+DELTA_T = 1 / 1024.0
+
+
+def _search(directory, duration, f_min=20.0):
+    cache = StrainCache(directory, offline=True)
+    noise = np.random.default_rng(int(duration)).normal(size=int(duration / DELTA_T)) * 1e-21
+    cache.store("SYNTHETIC", "H1", noise, DELTA_T, 1e9)
+    search = ligo.TemplateBank("SYNTHETIC", "H1", f_min=f_min, duration=8.0, dt=DELTA_T, cache=cache,
+                               waveform_cache=ligo.WaveformCache(), psd_provider=PSDProvider())
+    search.data.strain_duration = duration
+    return search
+
+
+@pytest.fixture
+def built(tmp_path):
+    search = _search(str(tmp_path), 32.0)
+    path = os.path.join(str(tmp_path), "bank")
+    return search, search.build_bank(path, [(30.0, 30.0)])
+
+
+def test_build_writes_complete_files(tmp_path, built):
+    _, bank_file = built
+    assert sorted(os.listdir(str(tmp_path))) == ["bank.json", "bank.npy", "strain"]
+    assert bank_file.meta["length"] == 32 * 1024
+    assert len(bank_file) == 1
+
+
+def test_reopened_bank_matches_data(tmp_path, built):
+    search, built_file = built
+    bank_file = bank.BankFile(os.path.join(str(tmp_path), "bank"))
+    data = search.data
+    bank_file.check(len(data.filtered_strain), data.filtered_strain.delta_f, data.f_min)
+    assert bank_file.matches(data.psd_interpolated)
+    assert bank_file.params.tolist() == built_file.params.tolist()
+    expected = ligo._frequency_template(ligo.WaveformCache(), 30.0, 30.0, data.f_min, DELTA_T, data.duration,
+                                        len(data.filtered_strain))
+    assert np.allclose(bank_file.template(0).numpy(), expected.numpy())
+
+
+def test_search_matching_bank(built):
+    search, bank_file = built
+    results = search.search_bank(bank_file)
+    assert results.shape == (1,) and np.isfinite(results["snr"]).all()
+
+
+def test_search_rejects_other_length(tmp_path, built):
+    _, bank_file = built
+    with pytest.raises(ValueError, match="échantillons"):
+        _search(str(tmp_path), 16.0).search_bank(bank_file)
+
+
+def test_search_rejects_other_f_min(tmp_path, built):
+    _, bank_file = built
+    with pytest.raises(ValueError, match="f_min"):
+        _search(str(tmp_path), 32.0, f_min=25.0).search_bank(bank_file)
+
+
+def test_check_rejects_other_delta_f(built):
+    _, bank_file = built
+    with pytest.raises(ValueError, match="delta_f"):
+        bank_file.check(bank_file.meta["length"], 2 * bank_file.meta["delta_f"], bank_file.meta["f_min"])
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from pycbc.types import TimeSeries
+
+from tp1_pkg import ligo
+from tp1_pkg.cache import StrainCache, strain_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StrainCache(str(tmp_path), offline=False)
+
+
+@pytest.fixture
+def download():
+    calls = []
+
+    def download(sample_rate=4096, duration=32):
+        calls.append((sample_rate, duration))
+        data = np.random.default_rng(len(calls)).normal(size=int(sample_rate * duration))
+        return TimeSeries(data, delta_t=1.0 / sample_rate, epoch=1126259446.4)
+
+    download.calls = calls
+    return download
+
+
+def test_second_fetch_hits_cache(cache, download):
+    first = cache.fetch("GW150914", "H1", download, 4096, 32)
+    second = cache.fetch("GW150914", "H1", download, 4096, 32)
+    assert len(download.calls) == 1
+    assert np.array_equal(first.numpy(), second.numpy())
+    assert second.delta_t == first.delta_t
+    assert float(second.start_time) == float(first.start_time)
+
+
+def test_key_includes_sample_rate_and_duration(cache, download):
+    cache.fetch("GW150914", "H1", download, 4096, 32)
+    strain = cache.fetch("GW150914", "H1", lambda: download(2048, 32), 2048, 32)
+    assert strain.sample_rate == 2048
+    strain = cache.fetch("GW150914", "H1", lambda: download(4096, 16), 4096, 16)
+    assert strain.duration == 16
+    assert len(download.calls) == 3
+
+
+def test_offline_miss_raises(tmp_path, download):
+    with pytest.raises(FileNotFoundError):
+        StrainCache(str(tmp_path), offline=True).fetch("GW150914", "H1", download, 4096, 32)
+    assert download.calls == []
+
+
+def test_strain_cache_argument(tmp_path, monkeypatch):
+    monkeypatch.setenv("TP1_CACHE_DIR", str(tmp_path))
+    assert isinstance(strain_cache(None), StrainCache)
+    assert isinstance(strain_cache(True), StrainCache)
+    assert strain_cache(False) is None
+    given = StrainCache(str(tmp_path))
+    assert strain_cache(given) is given
+
+
+def test_gwdata_loads_strain_once(tmp_path, monkeypatch, download):
+    class FakeMerger:
+        def __init__(self, name):
+            self.name = name
+
+        def strain(self, detector, duration=32, sample_rate=4096):
+            return download(sample_rate, duration)
+
+    monkeypatch.setattr(ligo, "Merger", FakeMerger)
+    for _ in range(2):
+        data = ligo.GWData("GW150914", "H1", 30.0, 30.0, 20.0, 32.0, 1 / 4096.0,
+                           cache=StrainCache(str(tmp_path)), strain_duration=32)
+        strain = data._load_strain()
+    assert download.calls == [(4096, 32)]
+    assert strain.sample_rate == 4096 and strain.duration == 32
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from tp1_pkg import correlation as co
+
+METHODS = ["auto", "direct", "strided", "fft"]
+SIZES = [(1, 10), (8, 8), (8, 9), (16, 1000), (200, 1000), (300, (1 << 16) + 1000)]
+
+
+def _loop(template, data):
+    # Boucle manuelle d'origine des méthodes `_correlation`.
+    n_g = template.size
+    return np.array([np.sum(template * data[i:i + n_g]) for i in range(data.size - n_g)])
+
+
+def _reference(template, data):
+    return np.correlate(data, template, "valid")[:co.n_lags(template.size, data.size)]
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("n_template, n_data", SIZES)
+def test_correlate_valid_matches_numpy(method, n_template, n_data):
+    rng = np.random.default_rng(n_template + n_data)
+    template, data = rng.normal(size=n_template), rng.normal(size=n_data)
+    out = co.correlate_valid(template, data, method)
+    assert out.shape == (co.n_lags(n_template, n_data),)
+    assert np.allclose(out, _reference(template, data))
+
+
+def test_reference_is_original_loop():
+    rng = np.random.default_rng(0)
+    template, data = rng.normal(size=50), rng.normal(size=400)
+    assert np.allclose(_loop(template, data), _reference(template, data))
+
+
+def test_template_longer_than_data():
+    assert co.correlate_valid(np.ones(20), np.ones(10)).shape == (0,)
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("n_template, n_data", [(16, 1000), (200, 1000)])
+def test_batch_rows_match_numpy(method, n_template, n_data):
+    rng = np.random.default_rng(1)
+    template, data = rng.normal(size=n_template), rng.normal(size=(5, n_data))
+    out = co.correlate_valid(template, data, method)
+    assert np.allclose(out, [_reference(template, row) for row in data])
+    assert np.allclose(co.TemplatePlan(template).correlate(data, method), out)
+
+
+def test_correlate_bank_matches_numpy():
+    rng = np.random.default_rng(2)
+    templates, data = rng.normal(size=(3, 64)), rng.normal(size=(1 << 16) + 500)
+    out = co.correlate_bank(templates, data)
+    assert np.allclose(out, [_reference(t, data) for t in templates])
+
+
+@pytest.mark.parametrize("chunk", [2, 4096])
+def test_snr_batch_matches_loop(chunk):
+    rng = np.random.default_rng(3)
+    template, signal, bruits = rng.normal(size=40), rng.normal(size=1000), rng.normal(size=(5, 1000))
+    snr, p0, snr_max = co.snr_batch(co.TemplatePlan(template), signal, bruits, chunk=chunk)
+    for i, bruit in enumerate(bruits):
+        expected = _loop(template, signal + bruit) / np.std(_loop(template, bruit))
+        assert np.allclose(snr[i], expected)
+        assert p0[i] == np.argmax(expected) and np.isclose(snr_max[i], expected.max())
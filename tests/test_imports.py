@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+import numpy as np
+from pycbc.types import TimeSeries
+
+from tp1_pkg import ligo
+
+HEAVY = ("pycbc", "matplotlib", "codecarbon", "scipy")
+
+
+def _loaded(code, modules=HEAVY):
+    script = code + "; import sys; print(' '.join(m for m in %r if m in sys.modules))" % (tuple(modules),)
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+def test_package_import_is_light():
+    assert _loaded("import tp1_pkg") == []
+
+
+def test_submodules_load_on_first_access():
+    assert _loaded("import tp1_pkg", ["tp1_pkg.bruit_blanc"]) == []
+    assert _loaded("import tp1_pkg; tp1_pkg.bb", ["tp1_pkg.bruit_blanc"]) == ["tp1_pkg.bruit_blanc"]
+    assert "pycbc" not in _loaded("import tp1_pkg.ligo")
+
+
+def test_merger_can_be_replaced(tmp_path, monkeypatch):
+    events = []
+
+    def merger(name):
+        events.append(name)
+        return FakeMerger()
+
+    class FakeMerger:
+        def strain(self, detector, duration=32, sample_rate=4096):
+            data = np.random.default_rng(0).normal(size=int(duration * sample_rate))
+            return TimeSeries(data, delta_t=1.0 / sample_rate, epoch=1e9)
+
+    monkeypatch.setattr(ligo, "Merger", merger)
+    data = ligo.GWData("GW150914", "H1", 30.0, 30.0, 20.0, 32.0, 1 / 1024.0, cache=False, strain_duration=8)
+    strain = data._load_strain()
+    assert events == ["GW150914"]
+    assert strain.sample_rate == 1024 and strain.duration == 8
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from tp1_pkg.bruit_blanc import BruitBlanc
+from tp1_pkg.bruit_colore import BruitColore
+from tp1_pkg.montecarlo import MonteCarlo
+
+
+@pytest.mark.parametrize("make", [
+    lambda: BruitBlanc(rng=np.random.default_rng(0)),
+    lambda: BruitColore(rng=np.random.default_rng(0)),
+    lambda: BruitColore(domain="frequency", rng=np.random.default_rng(0)),
+])
+def test_run_supported_simulators(make):
+    mc = MonteCarlo(make(), [0.0, 1.0], n_trials=20, chunk=10, seed=0, processes=1)
+    mc.run()
+    assert mc.injections.shape == (2, 20) and mc.noise.shape == (20,)
+    assert np.isfinite(mc.injections).all() and np.isfinite(mc.noise).all()
+
+
+def test_run_rejects_other_simulator():
+    with pytest.raises(TypeError, match="object"):
+        MonteCarlo(object(), [1.0], n_trials=10, chunk=10, seed=0, processes=1).run()
+
+
+def test_resume_same_campaign(tmp_path):
+    first = MonteCarlo(BruitBlanc(rng=np.random.default_rng(0)), [1.0], n_trials=20, chunk=10, seed=0,
+                       processes=1, directory=str(tmp_path)).run()
+    again = MonteCarlo(BruitBlanc(rng=np.random.default_rng(0)), [1.0], n_trials=20, chunk=10, seed=0,
+                       processes=1, directory=str(tmp_path)).run()
+    assert np.array_equal(first.injections, again.injections)
+
+
+@pytest.mark.parametrize("make", [
+    lambda a: BruitBlanc(A_bruit=a, rng=np.random.default_rng(0)),
+    lambda a: BruitColore(gamma=1.2 * a, rng=np.random.default_rng(0)),
+])
+def test_resume_rejects_other_noise(tmp_path, make):
+    MonteCarlo(make(1.0), [1.0], n_trials=20, chunk=10, seed=0, processes=1, directory=str(tmp_path)).run()
+    with pytest.raises(ValueError, match="autre campagne"):
+        MonteCarlo(make(2.0), [1.0], n_trials=20, chunk=10, seed=0, processes=1, directory=str(tmp_path)).run()
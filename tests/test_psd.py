@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+from pycbc.types import TimeSeries
+
+from tp1_pkg import ligo
+from tp1_pkg.cache import StrainCache
+from tp1_pkg.psd import PSDProvider
+
+
+def _strain(seed, scale=1.0):
+    data = np.random.default_rng(seed).normal(size=16 * 1024) * scale
+    return TimeSeries(data, delta_t=1 / 1024.0, epoch=1e9)
+
+
+@pytest.fixture
+def provider(tmp_path):
+    return PSDProvider(directory=str(tmp_path), segment_duration=2, highpass_cutoff=15)
+
+
+def test_key_depends_on_samples(provider):
+    quiet = provider.get("SYNTHETIC", "H1", provider.condition(_strain(0)))
+    loud = provider.get("SYNTHETIC", "H1", provider.condition(_strain(0, scale=10.0)))
+    assert np.allclose(loud.numpy()[100:], 100 * quiet.numpy()[100:], rtol=1e-6)
+
+
+def test_disk_cache_round_trip(tmp_path, provider):
+    strain = provider.condition(_strain(1))
+    psd = provider.get("SYNTHETIC", "H1", strain)
+    again = PSDProvider(directory=str(tmp_path), segment_duration=2, highpass_cutoff=15)
+    assert np.array_equal(again.get("SYNTHETIC", "H1", strain).numpy(), psd.numpy())
+    assert os.listdir(os.path.join(str(tmp_path), "psd"))
+
+
+def test_default_is_memory_only(tmp_path, monkeypatch):
+    monkeypatch.setenv("TP1_CACHE_DIR", str(tmp_path))
+    provider = PSDProvider(segment_duration=2)
+    provider.get("SYNTHETIC", "H1", provider.condition(_strain(2)))
+    assert not os.path.exists(os.path.join(str(tmp_path), "psd"))
+
+
+def test_gwdata_follows_strain_cache_choice(tmp_path):
+    assert ligo.GWData("E", "H1", 30, 30, 20, 32, 1 / 4096.0, cache=False).psd_provider.directory is False
+    cached = ligo.GWData("E", "H1", 30, 30, 20, 32, 1 / 4096.0, cache=StrainCache(str(tmp_path)))
+    assert cached.psd_provider.directory == str(tmp_path)
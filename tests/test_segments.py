@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from pycbc.types import TimeSeries
+
+from tp1_pkg import ligo
+from tp1_pkg.cache import StrainCache
+from tp1_pkg.segments import SegmentedFilter
+
+
+@pytest.fixture
+def merger(monkeypatch):
+    calls = []
+
+    class FakeMerger:
+        def __init__(self, name):
+            self.name = name
+
+        def strain(self, detector, duration=32, sample_rate=4096):
+            calls.append((sample_rate, duration))
+            data = np.random.default_rng(len(calls)).normal(size=int(sample_rate * duration))
+            return TimeSeries(data, delta_t=1.0 / sample_rate, epoch=1e9)
+
+    monkeypatch.setattr(ligo, "Merger", FakeMerger)
+    return calls
+
+
+def test_load_strain_ignores_other_sample_rate_and_duration(tmp_path, merger):
+    cache = StrainCache(str(tmp_path))
+    cache.store("GW150914", "H1", np.zeros(2048 * 16), 1 / 2048.0, 1e9)
+    strain = SegmentedFilter("GW150914", "H1", 30.0, 30.0, cache=cache, sample_rate=1024,
+                             strain_duration=8).load_strain()
+    assert merger == [(1024, 8)]
+    assert strain.sample_rate == 1024 and strain.duration == 8
+    SegmentedFilter("GW150914", "H1", 30.0, 30.0, cache=cache, sample_rate=1024, strain_duration=8).load_strain()
+    assert merger == [(1024, 8)]
+
+
+@pytest.mark.parametrize("shift, matches", [(0.0, True), (1e-4, True), (100.0, False), (5000.0, False)])
+def test_source_requires_same_span(tmp_path, shift, matches):
+    cache = StrainCache(str(tmp_path))
+    data = np.random.default_rng(0).normal(size=1024 * 8)
+    cache.store("GW150914", "H1", data, 1 / 1024.0, 1e9)
+    strain = TimeSeries(data, delta_t=1 / 1024.0, epoch=1e9 + shift)
+    source, shm = SegmentedFilter("GW150914", "H1", 30.0, 30.0, cache=cache)._source(strain)
+    if shm is not None:
+        ligo._release(shm)
+    assert (source[0] == "npy") is matches
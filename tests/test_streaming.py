@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from tp1_pkg.bruit_blanc import BruitBlanc
+from tp1_pkg.bruit_colore import BruitColore
+from tp1_pkg.streaming import StreamingDetector
+
+
+def _stream(detector, data, block_size):
+    stream = StreamingDetector.from_detector(detector)
+    pieces = []
+    for start in range(0, data.size, block_size):
+        position, snr = stream.update(data[start:start + block_size])
+        assert position == sum(p.size for p in pieces)
+        pieces.append(snr)
+    return np.concatenate(pieces)
+
+
+@pytest.mark.parametrize("block_size", [7, 64, 10000])
+def test_bruit_blanc_blocks_match_snr(block_size):
+    sim = BruitBlanc(rng=np.random.default_rng(0))
+    assert np.allclose(_stream(sim, sim.simulate_data, block_size), sim.snr)
+
+
+@pytest.mark.parametrize("block_size", [13, 256])
+def test_bruit_colore_blocks_match_snr(block_size):
+    sim = BruitColore(rng=np.random.default_rng(1))
+    assert np.allclose(_stream(sim, sim.data, block_size), sim.snr)
+
+
+def test_frequency_domain_rejected():
+    with pytest.raises(ValueError, match="frequency"):
+        StreamingDetector.from_detector(BruitColore(domain="frequency", rng=np.random.default_rng(2)))
@@ -0,0 +1,29 @@
+import numpy as np
+
+from tp1_pkg import triggers as tr
+
+
+def test_real_snr_thresholds_signed_value():
+    snr = np.zeros(200)
+    snr[60] = -5.0
+    snr[150] = 4.0
+    out = tr.cluster(snr, 3, 5)
+    assert out["time"].tolist() == [150.0]
+    assert out["snr"].tolist() == [4.0]
+
+
+def test_complex_snr_thresholds_modulus():
+    snr = np.zeros(200, dtype=complex)
+    snr[60] = -5.0
+    snr[150] = 4j
+    out = tr.cluster(snr, 3, 5)
+    assert out["time"].tolist() == [60.0, 150.0]
+    assert np.allclose(out["snr"], [5.0, 4.0])
+    assert np.allclose(out["phase"], [np.pi, np.pi / 2])
+
+
+def test_window_keeps_strongest():
+    snr = np.zeros(100)
+    snr[[10, 12, 14, 40]] = [4.0, 6.0, 5.0, 3.5]
+    out = tr.cluster(snr, 3, 10)
+    assert out["time"].tolist() == [12.0, 40.0]
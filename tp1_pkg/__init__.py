@@ -1,9 +1,25 @@
-from . import bruit_blanc as bb
-from . import bruit_colore as bc
-from . import ligo as lg
+import importlib
 
-bb.version
-bc.version
-lg.version
+# Les sous-modules sont importés au premier accès (tp1_pkg.bb, tp1_pkg.lg, ...) : importer le
+# package ne charge ni scipy, ni matplotlib, ni codecarbon, ni pycbc.
+_SUBMODULES = {
+    "bb": "bruit_blanc",
+    "bc": "bruit_colore",
+    "lg": "ligo",
+    "co": "correlation",
+    "st": "streaming",
+}
 
 __version__ = "1.0"
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module("." + _SUBMODULES[name], __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
@@ -1,21 +1,173 @@
-from . import bruit_blanc as bb
-from . import bruit_colore as bc
-from . import ligo as lg
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import copy
+import json
+import os
+
+import numpy as np
+
+from . import profiling
+
+
+def _parse_args(prog):
+    """
+    Lit les options de la ligne de commande communes aux trois scripts.
+
+    Description :
+    -------------
+    Sans option, les scripts gardent leur comportement interactif. Avec `--batch`, aucune
+    fenêtre n'est ouverte (backend "Agg"), les résultats numériques sont écrits en JSON et NPZ
+    et les figures sont enregistrées dans le dossier de sortie. Avec `--profile FICHIER`, le
+    temps de chaque étape est mesuré (voir `profiling`) et écrit dans `FICHIER` (JSON) et
+    `FICHIER.folded` (graphe de flammes). Avec `--seed N`, les simulations sont reproductibles.
+
+    Paramètres :
+    ------------
+    prog : str
+        Nom du script.
+
+    Retourne :
+    ----------
+    argparse.Namespace
+        Les options `batch`, `output`, `no_plot`, `profile` et `seed`.
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument("--batch", action="store_true",
+                        help="mode sans affichage : écrit les résultats et les figures dans --output")
+    parser.add_argument("--output", default="./results_" + prog + "/",
+                        help="dossier de sortie du mode batch")
+    parser.add_argument("--no-plot", action="store_true",
+                        help="n'effectue pas le rendu des figures en mode batch")
+    parser.add_argument("--profile", metavar="FICHIER",
+                        help="mesure le temps de chaque étape et l'écrit dans FICHIER (JSON)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="graine des tirages aléatoires (par défaut : entropie du système)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+    if args.batch:
+        import matplotlib
+        matplotlib.use("Agg")
+        os.makedirs(args.output, exist_ok=True)
+    return args
+
+
+def _save(output, name, summary, arrays):
+    """
+    Écrit le résumé d'une exécution en JSON et les tableaux associés en NPZ.
+    """
+    with open(os.path.join(output, name + ".json"), "w") as f:
+        json.dump(summary, f, indent=1)
+    np.savez(os.path.join(output, name + ".npz"), **arrays)
+    print("Resultats sauves dans le dossier " + output + " : " + name + ".json, " + name + ".npz")
+
+
+def _save_profile(args):
+    """
+    Écrit les mesures par étape si `--profile` est donné.
+    """
+    if args.profile:
+        profiling.dump_json(args.profile)
+        with open(args.profile + ".folded", "w") as f:
+            f.write(profiling.flame() + "\n")
+        print(profiling.summary())
+
+
+def _save_figure(fig, path):
+    import matplotlib.pyplot as plt
+
+    fig.savefig(path, format="png")
+    plt.close(fig)
+
 
 def main_bb():
 
-    bruit_b = bb.BruitBlanc()
-    bruit_b.Main()
+    # Les options (et le backend de matplotlib) sont lues avant tout import de pyplot.
+    args = _parse_args("bruit_blanc")
+    from . import bruit_blanc as bb
+    bruit_b = bb.BruitBlanc(rng=args.seed)
+    if not args.batch:
+        bruit_b.Main()
+        _save_profile(args)
+        return
+
+    p0 = bruit_b.Detection()
+    timings = bruit_b.TimeTracker()
+    _save(args.output, "bruit_blanc", {
+        "position": p0,
+        "snr_max": float(np.max(bruit_b.snr)),
+        "z": None if p0 is None else float((bruit_b.lambda_gen[p0] - bruit_b.lambda_0) / bruit_b.lambda_0),
+        "z_th": bruit_b.redshift_th,
+        "seed": args.seed,
+        "timings": {str(k): v for k, v in timings.items()},
+    }, {"lambda_gen": bruit_b.lambda_gen, "simulate_data": bruit_b.simulate_data, "snr": bruit_b.snr})
+    if not args.no_plot:
+        _save_figure(bruit_b.Plot(show=False), os.path.join(args.output, "bruit_blanc.png"))
+    _save_profile(args)
+
 
 def main_bc():
 
-    bruit_c = bc.BruitColore()
-    bruit_c.Main()
+    args = _parse_args("bruit_colore")
+    from . import bruit_colore as bc
+    bruit_c = bc.BruitColore(rng=args.seed)
+    if not args.batch:
+        bruit_c.Main()
+        _save_profile(args)
+        return
+
+    p0 = bruit_c.Detection()
+    timings = bruit_c.TimeTracker()
+    _save(args.output, "bruit_colore", {
+        "position": p0,
+        "snr_max": float(np.max(bruit_c.snr)),
+        "time": None if p0 is None else float(bruit_c.time_gen[p0]),
+        "time_th": float(bruit_c.time_th),
+        "seed": args.seed,
+        "timings": {str(k): v for k, v in timings.items()},
+    }, {"time_gen": bruit_c.time_gen, "data": bruit_c.data, "snr": bruit_c.snr})
+    if not args.no_plot:
+        _save_figure(bruit_c.PlotAll(show=False), os.path.join(args.output, "bruit_colore.png"))
+    _save_profile(args)
+
 
 def main_lg():
 
-	for m in [10, 15, 20, 25, 30, 35, 40, 45, 50]:
-		data_l = lg.GWData(event="GW150914", detector="H1", m1=m, m2=m, f_min=20.0, duration=32.0, dt=1 / 4096.0)
-		data_l.Main()
-	
-    
+    args = _parse_args("ligo")
+    from . import ligo as lg
+    masses = [10, 15, 20, 25, 30, 35, 40, 45, 50]
+
+    # Les donnees et la PSD sont chargees une seule fois, seul le modele change.
+    data_l = lg.GWData(event="GW150914", detector="H1", m1=None, m2=None, f_min=20.0, duration=32.0, dt=1 / 4096.0)
+    if not args.batch:
+        for m in masses:
+            data_l.m1 = m
+            data_l.m2 = m
+            data_l.Main()
+        _save_profile(args)
+        return
+
+    def render(snapshot):
+        snapshot.plot_data(output_dir=args.output)
+
+    # Le rendu des figures est fait dans un fil séparé, hors du chemin critique du filtrage ;
+    # `plot_data` construit ses figures sans pyplot, qui n'est pas sûr entre fils.
+    data_l.load_data()
+    rows = []
+    snrs = {}
+    figures = []
+    with ThreadPoolExecutor(max_workers=1) as renderer:
+        for m in masses:
+            data_l.m1 = m
+            data_l.m2 = m
+            data_l.generate_waveform()
+            data_l.filter_data()
+            snr_max, time_max = data_l.peak()
+            rows.append({"m1": m, "m2": m, "snr": float(snr_max), "time": float(time_max)})
+            snrs[f"snr_{m}"] = np.abs(data_l.snr.numpy())
+            if not args.no_plot:
+                figures.append(renderer.submit(render, copy.copy(data_l)))
+        for figure in figures:
+            figure.result()
+    _save(args.output, "ligo", {"event": data_l.event_name, "detector": data_l.detector, "templates": rows}, snrs)
+    _save_profile(args)
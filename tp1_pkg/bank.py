@@ -0,0 +1,197 @@
+from pycbc.filter import sigma
+from pycbc.types import FrequencySeries
+import numpy as np
+import hashlib
+import json
+import os
+
+from . import ligo
+from .cache import _write_json
+
+version = "1.0"
+
+BANK_PARAMS_DTYPE = np.dtype([("m1", np.float64), ("m2", np.float64), ("sigma", np.float64)])
+
+
+def psd_hash(psd):
+    """
+    Empreinte d'une PSD, utilisée pour savoir si les normalisations stockées sont valables.
+
+    Paramètres :
+    ------------
+    psd : FrequencySeries
+        Densité spectrale de puissance.
+
+    Retourne :
+    ----------
+    str
+        Empreinte SHA-256 hexadécimale des valeurs et du pas en fréquence.
+    """
+    h = hashlib.sha256(np.ascontiguousarray(psd.numpy()).tobytes())
+    h.update(repr(float(psd.delta_f)).encode())
+    return h.hexdigest()
+
+
+def build_bank(path, masses, f_min, delta_t, duration, length, psd, waveform_cache=None):
+    """
+    Génère une banque de modèles et l'enregistre dans le domaine fréquentiel.
+
+    Description :
+    -------------
+    Les modèles sont écrits ligne par ligne dans un fichier `.npy` projeté en mémoire (un modèle
+    complexe par ligne, déjà redimensionné à `length` échantillons), accompagné d'un fichier
+    `.json` contenant les paramètres de chaque modèle, sa normalisation `sigma` pour la PSD de
+    référence et l'empreinte de cette PSD. Les fichiers sont indépendants de la machine et
+    peuvent être partagés. Les deux fichiers sont écrits sous un nom temporaire puis renommés :
+    une construction interrompue ne laisse pas de banque corrompue.
+
+    Paramètres :
+    ------------
+    path : str
+        Chemin de la banque, sans extension.
+    masses : iterable
+        Couples (m1, m2) en masses solaires.
+    f_min : float
+        Fréquence minimale (en Hz).
+    delta_t : float
+        Pas de temps des données (en secondes).
+    duration : float
+        Durée des formes d'onde (en secondes).
+    length : int
+        Nombre d'échantillons des données.
+    psd : FrequencySeries
+        PSD de référence, interpolée au pas en fréquence des données.
+    waveform_cache : WaveformCache, optionnel (défaut = None)
+        Cache des modèles ; par défaut le cache en mémoire du module `ligo`.
+
+    Retourne :
+    ----------
+    BankFile
+        La banque ouverte en lecture.
+    """
+    masses = [(float(m1), float(m2)) for m1, m2 in masses]
+    cache = ligo.WAVEFORM_CACHE if waveform_cache is None else waveform_cache
+    tmp = path + ".tmp.npy"
+    templates = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.complex128,
+                                          shape=(len(masses), length // 2 + 1))
+    rows = []
+    htilde = None
+    for k, (m1, m2) in enumerate(masses):
+        htilde = ligo._frequency_template(cache, m1, m2, f_min, delta_t, duration, length)
+        templates[k] = htilde.numpy()
+        rows.append({"m1": m1, "m2": m2, "sigma": float(sigma(htilde, psd=psd, low_frequency_cutoff=f_min))})
+    templates.flush()
+    del templates
+    os.replace(tmp, path + ".npy")
+
+    meta = {
+        "approximant": ligo.APPROXIMANT,
+        "f_min": float(f_min),
+        "delta_t": float(delta_t),
+        "duration": float(duration),
+        "length": int(length),
+        "delta_f": float(htilde.delta_f) if htilde is not None else 1.0 / (length * delta_t),
+        "epoch": float(htilde.epoch) if htilde is not None else 0.0,
+        "psd_hash": psd_hash(psd),
+        "templates": rows,
+    }
+    _write_json(path + ".json", meta)
+    return BankFile(path)
+
+
+class BankFile:
+    """
+    Banque de modèles précalculés, lue directement depuis un fichier projeté en mémoire.
+
+    Description :
+    -------------
+    Les modèles sont lus sans génération ni FFT. Si la PSD utilisée pour le filtrage est la PSD
+    de référence de la banque, la normalisation stockée est réutilisée par `matched_filter`.
+
+    Attributs :
+    -----------
+        path : str
+        	Chemin de la banque, sans extension.
+        meta : dict
+        	Métadonnées de la banque.
+        params : numpy.ndarray
+        	Tableau structuré (m1, m2, sigma) des modèles.
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        with open(path + ".json") as f:
+            self.meta = json.load(f)
+        # Copie à l'écriture : pycbc exige des tampons modifiables, le fichier reste intact.
+        self._templates = np.load(path + ".npy", mmap_mode="c")
+        self.params = np.array([(t["m1"], t["m2"], t["sigma"]) for t in self.meta["templates"]],
+                               dtype=BANK_PARAMS_DTYPE)
+
+    def __len__(self):
+        return len(self.params)
+
+    def template(self, k):
+        """
+        Retourne le modèle numéro `k`.
+
+        Paramètres :
+        ------------
+        k : int
+            Indice du modèle.
+
+        Retourne :
+        ----------
+        FrequencySeries
+            Le modèle dans le domaine fréquentiel (vue sur le fichier, sans copie).
+        """
+        return FrequencySeries(self._templates[k], delta_f=self.meta["delta_f"], epoch=self.meta["epoch"], copy=False)
+
+    def matches(self, psd):
+        """
+        Indique si `psd` est la PSD de référence de la banque.
+
+        Paramètres :
+        ------------
+        psd : FrequencySeries
+            PSD utilisée pour le filtrage.
+
+        Retourne :
+        ----------
+        bool
+            True si les normalisations `sigma` stockées sont valables pour `psd`.
+        """
+        return psd_hash(psd) == self.meta["psd_hash"]
+
+    def check(self, length, delta_f, f_min):
+        """
+        Vérifie que la banque a été construite pour des données de ce format.
+
+        Paramètres :
+        ------------
+        length : int
+            Nombre d'échantillons des données.
+        delta_f : float
+            Pas en fréquence des données (en Hz).
+        f_min : float
+            Fréquence minimale du filtrage (en Hz).
+
+        Retourne :
+        ----------
+        Aucun. Lève ValueError si la longueur, le pas en fréquence ou la fréquence minimale de la
+        banque diffèrent de ceux des données.
+        """
+        meta = self.meta
+        if int(length) != meta["length"]:
+            raise ValueError(f"Banque {self.path} construite pour {meta['length']} échantillons, "
+                             f"les données en ont {int(length)}.")
+        if not np.isclose(float(delta_f), meta["delta_f"], rtol=1e-9, atol=0.0):
+            raise ValueError(f"Banque {self.path} construite pour delta_f = {meta['delta_f']} Hz, "
+                             f"les données ont delta_f = {float(delta_f)} Hz.")
+        if not np.isclose(float(f_min), meta["f_min"]):
+            raise ValueError(f"Banque {self.path} construite pour f_min = {meta['f_min']} Hz, "
+                             f"le filtrage utilise f_min = {float(f_min)} Hz.")
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self.template(k)
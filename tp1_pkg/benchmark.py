@@ -0,0 +1,259 @@
+from contextlib import ExitStack, contextmanager, redirect_stdout
+import argparse
+import datetime
+import fnmatch
+import io
+import json
+import platform
+import tempfile
+import time
+
+import numpy as np
+
+version = "1.0"
+
+# Durée minimale (en secondes) d'une répétition : le nombre d'appels par répétition est ajusté.
+MIN_REPEAT_TIME = 0.05
+
+
+def measure(func, repeat=7, warmup=1, number=None):
+    """
+    Mesure le temps d'exécution d'une fonction sans argument.
+
+    Description :
+    -------------
+    La fonction est d'abord appelée `warmup` fois (caches, allocations, plans FFT). Le nombre
+    d'appels par répétition est ensuite choisi pour qu'une répétition dure au moins
+    `MIN_REPEAT_TIME`, puis `repeat` répétitions sont chronométrées avec `time.perf_counter`.
+    Les statistiques portent sur le temps d'un appel.
+
+    Paramètres :
+    ------------
+    func : callable
+        Fonction à mesurer.
+    repeat : int, optionnel (défaut = 7)
+        Nombre de répétitions chronométrées.
+    warmup : int, optionnel (défaut = 1)
+        Nombre d'appels de chauffe, non chronométrés.
+    number : int, optionnel (défaut = None)
+        Nombre d'appels par répétition ; calibré automatiquement si None.
+
+    Retourne :
+    ----------
+    dict
+        `min`, `median`, `mean`, `std` (en secondes par appel), `repeat` et `number`.
+    """
+    for _ in range(warmup):
+        func()
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= MIN_REPEAT_TIME or number >= 1 << 20:
+                break
+            number *= 2
+    times = np.empty(repeat)
+    for k in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times[k] = (time.perf_counter() - start) / number
+    return {
+        "min": float(times.min()),
+        "median": float(np.median(times)),
+        "mean": float(times.mean()),
+        "std": float(times.std()),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def _bruit_blanc(seed):
+    from . import bruit_blanc as bb
+
+    return bb.BruitBlanc(rng=seed)
+
+
+def _bruit_colore(seed, **kwargs):
+    from . import bruit_colore as bc
+
+    return bc.BruitColore(rng=seed, **kwargs)
+
+
+def _case_correlation(size, seed):
+    obj = _bruit_blanc(seed)
+    data = np.random.default_rng(seed).normal(size=size)
+    return lambda: obj._correlation(data)
+
+
+def _case_correlation_scipy(size, seed):
+    obj = _bruit_blanc(seed)
+    data = np.random.default_rng(seed).normal(size=size)
+    return lambda: obj._correlation_scipy(data)
+
+
+def _case_covariance(cov_mode):
+    def case(size, seed):
+        obj = _bruit_colore(seed, cov_mode=cov_mode)
+        return obj._covariance
+    return case
+
+
+def _case_filter_g(cov_mode):
+    def case(size, seed):
+        obj = _bruit_colore(seed, cov_mode=cov_mode)
+        return obj._filter_g
+    return case
+
+
+def _case_bruit_colore(size, seed):
+    obj = _bruit_colore(seed)
+    return obj._bruit_colore
+
+
+def _case_bruit_colore_batch(size, seed):
+    obj = _bruit_colore(seed)
+    return lambda: obj._bruit_colore_batch(size)
+
+
+def _case_psd(size, seed):
+    obj = _bruit_colore(seed)
+    obj.time_gen = np.linspace(0, 10, size)
+    return obj.PSD
+
+
+@contextmanager
+def _case_filter_data(size, seed):
+    from .cache import StrainCache
+    from .psd import PSDProvider
+    from . import ligo
+
+    delta_t = 1 / 4096.0
+    noise = np.random.default_rng(seed).normal(size=int(size / delta_t)) * 1e-21
+    # Le dossier des données synthétiques est supprimé à la fin de la mesure.
+    with tempfile.TemporaryDirectory(prefix="tp1_benchmark_") as directory:
+        cache = StrainCache(directory, offline=True)
+        cache.store("SYNTHETIC", "H1", noise, delta_t, 1e9)
+        data = ligo.GWData("SYNTHETIC", "H1", 30.0, 30.0, 20.0, 32.0, delta_t, cache=cache,
+                           waveform_cache=ligo.WaveformCache(), psd_provider=PSDProvider(directory=False),
+                           strain_duration=size)
+        data.load_data()
+        data.generate_waveform()
+        yield data.filter_data
+        data.strain = None
+
+
+# Cas mesurés : nom -> (construction du cas à partir de (taille, graine), tailles, unité de la taille).
+# La construction retourne la fonction à mesurer, ou un contexte qui la fournit et libère ensuite
+# ses ressources (fichiers temporaires).
+CASES = {
+    "bruit_blanc._correlation": (_case_correlation, [1000, 10000, 100000], "samples"),
+    "bruit_blanc._correlation_scipy": (_case_correlation_scipy, [1000, 10000, 100000], "samples"),
+    "bruit_colore._covariance[exact]": (_case_covariance("exact"), [100], "samples"),
+    "bruit_colore._covariance[montecarlo]": (_case_covariance("montecarlo"), [100], "samples"),
+    "bruit_colore._filter_g[levinson]": (_case_filter_g("exact"), [100], "samples"),
+    "bruit_colore._filter_g[cholesky]": (_case_filter_g("montecarlo"), [100], "samples"),
+    "bruit_colore._bruit_colore": (_case_bruit_colore, [1000], "samples"),
+    "bruit_colore._bruit_colore_batch": (_case_bruit_colore_batch, [10, 100, 1000], "trials"),
+    "bruit_colore.PSD": (_case_psd, [1000, 10000, 100000], "samples"),
+    "ligo.GWData.filter_data": (_case_filter_data, [32, 64, 128], "seconds"),
+}
+
+
+def run(pattern="*", repeat=7, warmup=1, seed=0, quick=False):
+    """
+    Exécute les cas de mesure dont le nom correspond au motif.
+
+    Paramètres :
+    ------------
+    pattern : str, optionnel (défaut = "*")
+        Motif (style shell) sur les noms de `CASES`.
+    repeat : int, optionnel (défaut = 7)
+        Nombre de répétitions par mesure.
+    warmup : int, optionnel (défaut = 1)
+        Nombre d'appels de chauffe.
+    seed : int, optionnel (défaut = 0)
+        Graine des données, identique d'une exécution à l'autre.
+    quick : bool, optionnel (défaut = False)
+        Ne mesure que la plus petite taille de chaque cas.
+
+    Retourne :
+    ----------
+    dict
+        Rapport : environnement d'exécution et liste des résultats (`name`, `size`, `unit` et
+        statistiques de `measure`).
+    """
+    from . import __version__
+
+    results = []
+    for name, (build, sizes, unit) in CASES.items():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        for size in sizes[:1] if quick else sizes:
+            with redirect_stdout(io.StringIO()), ExitStack() as stack:
+                func = build(size, seed)
+                if hasattr(func, "__enter__"):
+                    func = stack.enter_context(func)
+                stats = measure(func, repeat=repeat, warmup=warmup)
+            results.append({"name": name, "size": size, "unit": unit, **stats})
+            print(f"{name:40s} {size:>8} {unit:8s} {stats['median'] * 1e3:12.4f} ms")
+    return {
+        "package_version": __version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "seed": seed,
+        "repeat": repeat,
+        "warmup": warmup,
+        "results": results,
+    }
+
+
+def compare(baseline, current):
+    """
+    Compare deux rapports de mesure (médianes) et retourne le rapport des temps.
+
+    Paramètres :
+    ------------
+    baseline : dict
+        Rapport de référence (par exemple d'une version précédente).
+    current : dict
+        Rapport à comparer.
+
+    Retourne :
+    ----------
+    list
+        Triplets `(name, size, ratio)` avec `ratio = current / baseline` (> 1 : plus lent).
+    """
+    ref = {(r["name"], r["size"]): r["median"] for r in baseline["results"]}
+    return [(r["name"], r["size"], r["median"] / ref[(r["name"], r["size"])])
+            for r in current["results"] if (r["name"], r["size"]) in ref]
+
+
+def main():
+    """
+    Point d'entrée du script `tp1_benchmark`.
+    """
+    parser = argparse.ArgumentParser(prog="tp1_benchmark")
+    parser.add_argument("--output", default="benchmark.json", help="fichier JSON des résultats")
+    parser.add_argument("--filter", default="*", help="motif sur les noms des cas (ex. 'bruit_colore.*')")
+    parser.add_argument("--repeat", type=int, default=7, help="nombre de répétitions")
+    parser.add_argument("--warmup", type=int, default=1, help="nombre d'appels de chauffe")
+    parser.add_argument("--seed", type=int, default=0, help="graine des données")
+    parser.add_argument("--quick", action="store_true", help="plus petite taille de chaque cas seulement")
+    parser.add_argument("--compare", metavar="BASELINE", help="rapport JSON de référence à comparer")
+    args = parser.parse_args()
+
+    report = run(args.filter, args.repeat, args.warmup, args.seed, args.quick)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print("Resultats sauves dans " + args.output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for name, size, ratio in compare(baseline, report):
+            print(f"{name:40s} {size:>8} x{ratio:.3f}")
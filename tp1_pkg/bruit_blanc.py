@@ -1,10 +1,13 @@
 import numpy as np
 import scipy as sp
-import matplotlib.pyplot as plt
 import time
-import codecarbon as cc
 import logging
 
+from . import correlation as co
+from . import triggers as tr
+from . import lazy
+from . import rng as rg
+
 version = "1.0"
 
 logging.getLogger("codecarbon").disabled = True
@@ -43,10 +46,29 @@ class BruitBlanc:
         Modèle théorique basé sur une loi normale.
     snr : ndarray
         Rapport signal-bruit (SNR) calculé.
+    rng : numpy.random.Generator
+        Générateur de nombres aléatoires de la simulation (voir `rng.generator`).
+
+    Les grandeurs dérivées (`lambda_gen`, `signal`, `simulate_data`, `model`, `snr`) sont calculées
+    au premier accès et recalculées seulement quand une de leurs entrées change (voir `lazy`).
+    Les tirages aléatoires (`redshift_th`, `bruit`) sont faits à la construction, dans cet ordre,
+    avec le générateur `rng` : une même graine donne la même simulation.
     """
+
+    a_signal = lazy.Input()
+    sigma_model = lazy.Input()
+    lambda_obs = lazy.Input()
+    bruit = lazy.Input()
+    lambda_gen = lazy.Derived("_lambda_gen")
+    signal = lazy.Derived("_signal", ("lambda_gen", "lambda_obs", "a_signal"))
+    simulate_data = lazy.Derived("_simulate_data", ("signal", "bruit"))
+    model = lazy.Derived("_model", ("sigma_model",))
+    _plan = lazy.Derived(lambda self: co.TemplatePlan(self.model), ("model",))
+    snr = lazy.Derived("SNR", ("bruit", "simulate_data", "model"))
     
-    def __init__(self, lambda_0=656.3, A_signal=100.0, A_bruit=1.0, sigma_model=8.0, opt=False):
+    def __init__(self, lambda_0=656.3, A_signal=100.0, A_bruit=1.0, sigma_model=8.0, opt=False, rng=None):
         
+        self.rng = rg.generator(rng)
         self.lambda_0 = lambda_0
         self.a_signal = A_signal
         self.a_bruit = A_bruit
@@ -54,13 +76,6 @@ class BruitBlanc:
         self.opt = opt
         
         self.redshift_th = None
-        self.lambda_obs = None
-        self.lambda_gen = None
-        self.signal = None
-        self.bruit = None
-        self.simulate_data = None
-        self.model = None
-        self.snr = None
         
         self._compile_data()
     
@@ -86,6 +101,8 @@ class BruitBlanc:
             Écart-type du modèle de signal, par défaut 8.0.
         opt : bool, optionnel
             Indicateur d'activation des optimisations, par défaut False.
+        rng : None, int, SeedSequence ou Generator, optionnel
+            Graine ou générateur des tirages aléatoires, par défaut None (entropie du système).
         """
 
         self.Detection()
@@ -95,9 +112,9 @@ class BruitBlanc:
 
     def _compile_data(self):
         """
-        Compile toutes les données nécessaires pour l'analyse du signal : 
-        calcul de la longueur d'onde observée, génération du signal, ajout du bruit, 
-        simulation des données, création du modèle, et calcul du SNR.
+        Effectue les tirages aléatoires de la simulation : redshift théorique (donc longueur d'onde
+        observée) puis bruit, dans cet ordre. Le signal, les données simulées, le modèle et le SNR
+        sont calculés au premier accès.
 
         Cette méthode est appelée automatiquement lors de l'initialisation de l'objet.
         
@@ -107,12 +124,7 @@ class BruitBlanc:
         """
         
         self._lambda_obs()
-        self._lambda_gen()
-        self._signal()
         self._bruit()
-        self._simulate_data()
-        self._model()
-        self.SNR()
 
     def TurnOpt(self):
         """
@@ -139,7 +151,8 @@ class BruitBlanc:
         
     def _update_signal_amplitude(self, A_signal):
         """
-        Met à jour l'amplitude du signal et recalcule les données simulées et le rapport signal-bruit (SNR).
+        Met à jour l'amplitude du signal ; le signal, les données simulées et le rapport signal-bruit (SNR)
+        seront recalculés au prochain accès.
 
         Paramètres :
         ------------
@@ -151,15 +164,12 @@ class BruitBlanc:
         Aucun.
         """
         
-        self.signal = self.signal / self.a_signal
         self.a_signal = A_signal
-        self.signal = self.signal * self.a_signal
-        self._simulate_data()
-        self.SNR()
     
     def _update_bruit_amplitude(self, A_bruit):
         """
-        Met à jour l'amplitude du bruit et recalcule les données simulées et le rapport signal-bruit (SNR).
+        Met à jour l'amplitude du bruit (même réalisation, remise à l'échelle) ; les données simulées et le
+        rapport signal-bruit (SNR) seront recalculés au prochain accès.
 
         Paramètres :
         ------------
@@ -171,15 +181,13 @@ class BruitBlanc:
         Aucun.
         """
         
-        self.bruit = self.bruit / self.a_bruit
+        self.bruit = self.bruit / self.a_bruit * A_bruit
         self.a_bruit = A_bruit
-        self.bruit = self.bruit * self.a_bruit
-        self._simulate_data()
-        self.SNR()
         
     def _update_sigma_model(self, sigma_model):
         """
-        Met à jour la déviation standard du modèle et recalcule le rapport signal-bruit (SNR).
+        Met à jour la déviation standard du modèle ; le modèle et le rapport signal-bruit (SNR) seront
+        recalculés au prochain accès.
 
         Paramètres :
         ------------
@@ -192,8 +200,6 @@ class BruitBlanc:
         """
         
         self.sigma_model = sigma_model
-        self._model()
-        self.SNR()
 
     def _lambda_obs(self):
         """
@@ -204,7 +210,7 @@ class BruitBlanc:
         Aucun.
         """
         
-        self.redshift_th = np.random.uniform(0.0, 1.0)
+        self.redshift_th = self.rng.uniform(0.0, 1.0)
         self.lambda_obs = self.lambda_0*(1+self.redshift_th)
 
     def _lambda_gen(self):
@@ -239,7 +245,27 @@ class BruitBlanc:
         Aucun.
         """
         
-        self.bruit = self.a_bruit*np.random.normal(size=1000)
+        self.bruit = self.a_bruit*self.rng.normal(size=1000)
+
+    def _bruit_batch(self, n_trials, rng=None):
+        """
+        Génère plusieurs réalisations indépendantes du bruit gaussien blanc.
+
+        Paramètres :
+        ------------
+        n_trials : int
+            Nombre de réalisations.
+        rng : None, int, SeedSequence ou Generator, optionnel
+            Flux aléatoire à utiliser, par défaut le générateur `rng` de l'objet.
+
+        Retourne :
+        ----------
+        ndarray
+            Tableau de forme (n_trials, 1000), une réalisation par ligne.
+        """
+        
+        rng = self.rng if rng is None else rg.generator(rng)
+        return self.a_bruit*rng.normal(size=(n_trials, 1000))
 
     def _simulate_data(self):
         """
@@ -261,13 +287,49 @@ class BruitBlanc:
         Aucun.
         """
         
+        self.model = self._models(self.sigma_model)
+
+    def _models(self, sigma_model):
+        """
+        Génère un ou plusieurs modèles gaussiens pour des déviations standards données.
+
+        Paramètres :
+        ------------
+        sigma_model : float ou ndarray
+            Déviation(s) standard(s) du modèle.
+
+        Retourne :
+        ----------
+        ndarray
+            Le modèle (60 points), ou un tableau de forme (len(sigma_model), 60) contenant un
+            modèle par ligne.
+        """
+        
         h = (1400 - 600) / 1000
         x = np.arange(60) * h
-        self.model = sp.stats.norm.pdf(x, x[29], self.sigma_model)
+        sigma_model = np.asarray(sigma_model, dtype=float)
+        return sp.stats.norm.pdf(x, x[29], sigma_model[..., np.newaxis])
+
+    def _template_plan(self):
+        """
+        Retourne le plan de corrélation associé au modèle courant.
+
+        Le spectre du modèle est calculé au premier appel puis réutilisé par tous les calculs du SNR,
+        jusqu'à ce que le modèle change (par exemple via `_update_sigma_model`).
+
+        Retourne :
+        ----------
+        correlation.TemplatePlan
+            Plan de corrélation du modèle.
+        """
+        
+        return self._plan
 
     def _correlation(self, vector_data):
         """
         Applique une corrélation croisée manuelle pour estimer le SNR entre le signal observé et le bruit.
+        Les décalages sont ceux de la boucle historique `range(N - N_g)`, calculés sans boucle Python
+        à partir du plan de corrélation du modèle (voir `_template_plan`).
 
         Paramètres :
         ------------
@@ -280,16 +342,7 @@ class BruitBlanc:
             Série des corrélations pour chaque décalage.
         """
         
-        f_g = self.model
-        N_g = np.size(f_g)
-        d = vector_data
-        N = np.size(d)
-        l = []
-
-        for i in range(N-N_g):
-            l.append(np.sum(f_g * d[i:i+N_g]))
-
-        return np.array(l)
+        return self._template_plan().correlate(vector_data)
     
     def _correlation_scipy(self, vector_data):
         """
@@ -327,13 +380,34 @@ class BruitBlanc:
         sigma_bruit = np.std(tau_bruit)
         self.snr = tau_obs / sigma_bruit
 
+    def SNRBatch(self, bruits):
+        """
+        Calcule le SNR pour un lot de réalisations du bruit, sans créer un objet par tirage.
+
+        Les données de chaque essai sont le signal courant additionné à une ligne de `bruits`. Les
+        corrélations sont calculées par FFT sur tout le tableau (voir `correlation.snr_batch`).
+
+        Paramètres :
+        ------------
+        bruits : ndarray
+            Tableau 2-D des réalisations du bruit (une par ligne), par exemple `_bruit_batch(n)`.
+
+        Retourne :
+        ----------
+        tuple
+            `(snr, p0, snr_max)` : SNR de chaque essai, position et valeur de son maximum.
+        """
+        
+        return co.snr_batch(self._template_plan(), self.signal, bruits)
+
     def Detection(self):
         """
         Détecte la position du signal en fonction du SNR et compare le redshift détecté au redshift théorique.
 
         Retourne :
         ----------
-        Aucun.
+        int ou None
+            La position du signal détecté, ou None si aucun signal n'est détecté.
         """
         
         p0 = np.argmax(self.snr)
@@ -342,9 +416,37 @@ class BruitBlanc:
             d = self.lambda_gen
             lambda_max = d[p0]
             print(f'z = {(lambda_max - self.lambda_0) / self.lambda_0}, avec z_th = {self.redshift_th}')
+            return int(p0)
         else:
             print("Aucun signal detectee.")
-            
+            return None
+
+    def Triggers(self, threshold=3.0, window=None):
+        """
+        Extrait tous les déclenchements du SNR, et pas seulement son maximum.
+
+        Les positions où le SNR dépasse le seuil sont regroupées par fenêtres ; seule la plus forte
+        de chaque fenêtre est gardée, ce qui permet de trouver plusieurs signaux dans les données.
+
+        Paramètres :
+        ------------
+        threshold : float, optionnel
+            Seuil de détection, 3 comme dans `Detection`.
+        window : float, optionnel
+            Largeur de la fenêtre de regroupement (en nm) ; par défaut la longueur du modèle.
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            Tableau structuré (time, snr, phase, template_id) ; le champ `time` contient la
+            longueur d'onde (en nm) de chaque déclenchement.
+        """
+        
+        h = self.lambda_gen[1] - self.lambda_gen[0]
+        if window is None:
+            window = len(self.model) * h
+        return tr.cluster(self.snr, threshold, window, h, self.lambda_gen[0])
+
     def _redshift(self):
         """
         Calcule le redshift (décalage vers le rouge) estimé à partir du rapport signal-bruit (SNR).
@@ -363,6 +465,104 @@ class BruitBlanc:
         else:
             return None
 
+    def _redshift_batch(self, snr):
+        """
+        Calcule le redshift déduit pour chaque ligne d'un tableau de SNR.
+
+        Même règle que `_redshift` : la position du maximum doit être au-dessus du seuil.
+
+        Paramètres :
+        ------------
+        snr : ndarray
+            Tableau 2-D de SNR, une courbe par ligne.
+
+        Retourne :
+        ----------
+        ndarray
+            Redshift déduit pour chaque ligne, NaN si la position maximale est sous le seuil.
+        """
+        
+        p0 = np.argmax(snr, axis=-1)
+        z = (self.lambda_gen[p0] - self.lambda_0) / self.lambda_0
+        z[p0 <= 3] = np.nan
+        return z
+
+    def SweepSignalAmplitude(self, amplitudes):
+        """
+        Calcule le redshift déduit pour toute une grille d'amplitudes du signal, en une seule passe.
+
+        La corrélation étant linéaire, `tau_obs = A * tau_signal_unitaire + tau_bruit` : le signal
+        unitaire et le bruit ne sont corrélés qu'une seule fois. Les autres paramètres (bruit,
+        modèle) sont ceux de l'objet, qui n'est pas modifié.
+
+        Paramètres :
+        ------------
+        amplitudes : ndarray
+            Amplitudes du signal à évaluer.
+
+        Retourne :
+        ----------
+        ndarray
+            Redshift déduit pour chaque amplitude (NaN si non détecté).
+        """
+        
+        amplitudes = np.asarray(amplitudes, dtype=float)
+        plan = self._template_plan()
+        tau_signal = plan.correlate(self.signal / self.a_signal)
+        tau_bruit = plan.correlate(self.bruit)
+        snr = (amplitudes[:, np.newaxis] * tau_signal + tau_bruit) / np.std(tau_bruit)
+        return self._redshift_batch(snr)
+
+    def SweepBruitAmplitude(self, amplitudes):
+        """
+        Calcule le redshift déduit pour toute une grille d'amplitudes du bruit, en une seule passe.
+
+        Le bruit unitaire n'est corrélé qu'une seule fois : pour une amplitude A, la corrélation du
+        bruit et son écart-type sont simplement multipliés par A. L'objet n'est pas modifié.
+
+        Paramètres :
+        ------------
+        amplitudes : ndarray
+            Amplitudes du bruit à évaluer.
+
+        Retourne :
+        ----------
+        ndarray
+            Redshift déduit pour chaque amplitude (NaN si non détecté).
+        """
+        
+        amplitudes = np.asarray(amplitudes, dtype=float)[:, np.newaxis]
+        plan = self._template_plan()
+        tau_signal = plan.correlate(self.signal)
+        tau_bruit = plan.correlate(self.bruit / self.a_bruit)
+        snr = (tau_signal + amplitudes * tau_bruit) / (amplitudes * np.std(tau_bruit))
+        return self._redshift_batch(snr)
+
+    def SweepSigmaModel(self, sigmas):
+        """
+        Calcule le redshift déduit pour toute une grille de déviations standards du modèle.
+
+        Les modèles sont empilés et corrélés ensemble avec le bruit et les données : le spectre de
+        chaque série n'est calculé qu'une fois (voir `correlation.correlate_bank`). L'objet n'est
+        pas modifié.
+
+        Paramètres :
+        ------------
+        sigmas : ndarray
+            Déviations standards du modèle à évaluer.
+
+        Retourne :
+        ----------
+        ndarray
+            Redshift déduit pour chaque déviation standard (NaN si non détecté).
+        """
+        
+        models = self._models(np.atleast_1d(sigmas))
+        tau_bruit = co.correlate_bank(models, self.bruit)
+        tau_obs = co.correlate_bank(models, self.simulate_data)
+        snr = tau_obs / np.std(tau_bruit, axis=-1, keepdims=True)
+        return self._redshift_batch(snr)
+
     def TimeTracker(self):
         """
         Suivi du temps d'exécution des calculs de rapport signal-bruit (SNR) avec et sans optimisation.
@@ -372,13 +572,16 @@ class BruitBlanc:
         
         Retourne :
         ----------
-        Aucun.
+        dict
+            Temps d'exécution (en secondes) pour chaque valeur de `opt`.
         """
         
+        timings = {}
         start_time = time.time()
         for _ in range(1000):
             self._update_SNR()
         end_time = time.time()
+        timings[self.opt] = end_time - start_time
         print(f"Temps d'execution pour opt = {self.opt} : {end_time - start_time} secondes.")
 
         self.TurnOpt()
@@ -387,7 +590,9 @@ class BruitBlanc:
         for _ in range(1000):
             self._update_SNR()
         end_time = time.time()
+        timings[self.opt] = end_time - start_time
         print(f"Temps d'execution pour opt = {self.opt} : {end_time - start_time} secondes.")
+        return timings
 
     def CarbonTracker(self):
         """
@@ -400,7 +605,8 @@ class BruitBlanc:
         ----------
         Aucun.
         """
-        
+        import codecarbon as cc
+
         tracker = cc.EmissionsTracker(save_to_file=False)
         tracker.start()
         for _ in range(1000):
@@ -417,14 +623,25 @@ class BruitBlanc:
         emission = tracker.stop()
         print(f"CO2 generer pour opt = {self.opt} : {emission} kg.")
         
-    def Plot(self):
+    def Plot(self, show=True):
         """
         Affiche tous les graphiques (Signal, Données simulées, SNR, etc.) sur une seule page.
+        Les courbes d'influence des paramètres sont calculées par `SweepSignalAmplitude`,
+        `SweepBruitAmplitude` et `SweepSigmaModel`.
+
+        Paramètres :
+        ------------
+        show : bool, optionnel
+            Affiche la fenêtre interactive (par défaut True). En mode batch, la figure est
+            seulement retournée pour être enregistrée.
 
         Retourne :
         ----------
-        Aucun.
+        Figure
+            La figure matplotlib.
         """
+        import matplotlib.pyplot as plt
+
         # Créer une figure avec plusieurs sous-graphes
         fig, axs = plt.subplots(3, 2, figsize=(16, 9))
         plt.subplots_adjust(hspace=0.3)
@@ -448,17 +665,8 @@ class BruitBlanc:
         axs[1, 0].set_title("Fluctuations du SNR")
 
         # Tracer l'influence de l'amplitude du signal sur le redshift
-        x = None
-        y = None
-
-        x = []
-        y = []
-        for i in range(100):
-            self._update_signal_amplitude(i+1)
-            l = self._redshift()
-            x.append(i+1)
-            y.append((l-self.lambda_0)/self.lambda_0)
-        axs[1, 1].plot(x, y)
+        x = np.arange(1, 101)
+        axs[1, 1].plot(x, self.SweepSignalAmplitude(x))
         axs[1, 1].set_title("Influence de l'amplitude du signal sur sa detection")
         axs[1, 1].set_xlabel('Amplitude du signal')
         axs[1, 1].set_ylabel('Redshift deduit')
@@ -466,17 +674,7 @@ class BruitBlanc:
         axs[1, 1].legend()
 
         # Tracer l'influence de l'amplitude du bruit sur le redshift
-        x = None
-        y = None
-
-        x = []
-        y = []
-        for i in range(100):
-            self._update_bruit_amplitude(i+1)
-            l = self._redshift()
-            x.append(i+1)
-            y.append((l-self.lambda_0)/self.lambda_0)
-        axs[2, 0].plot(x, y)
+        axs[2, 0].plot(x, self.SweepBruitAmplitude(x))
         axs[2, 0].set_title("Influence de l'amplitude du bruit sur la detection du signal")
         axs[2, 0].set_xlabel('Amplitude du bruit')
         axs[2, 0].set_ylabel('Redshift deduit')
@@ -484,17 +682,7 @@ class BruitBlanc:
         axs[2, 0].legend()
 
         # Tracer l'influence de la déviation standard du modèle sur le redshift
-        x = None
-        y = None
-        x = []
-        y = []
-        self._update_bruit_amplitude(1.0)
-        for i in range(100):
-            self._update_sigma_model(i+1)
-            l = self._redshift()
-            x.append(i+1)
-            y.append((l-self.lambda_0)/self.lambda_0)
-        axs[2, 1].plot(x, y)
+        axs[2, 1].plot(x, self.SweepSigmaModel(x))
         axs[2, 1].set_title("Influence de la deviation standard du modele sur la detection du signal")
         axs[2, 1].set_xlabel('Deviation standard du modele')
         axs[2, 1].set_ylabel('Redshift deduit')
@@ -503,4 +691,6 @@ class BruitBlanc:
 
         # Afficher les graphiques
         plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        if show:
+            plt.show()
+        return fig
\ No newline at end of file
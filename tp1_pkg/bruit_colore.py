@@ -1,10 +1,14 @@
 import numpy as np
 import scipy as sp
-import matplotlib.pyplot as plt
 import time
-import codecarbon as cc
 import logging
 
+from . import correlation as co
+from . import triggers as tr
+from .profiling import timed
+from . import lazy
+from . import rng as rg
+
 version = "1.0"
 
 logging.getLogger("codecarbon").disabled = True
@@ -27,6 +31,11 @@ class BruitColore:
 		Exposant pour la densité spectrale de puissance (PSD), défini par défaut à 1.2.
 	opt : bool
 		Indicateur de l'option de performance, défini par défaut à False.
+	cov_mode : str
+		Méthode de calcul de la covariance : "exact" (défaut) ou "montecarlo".
+	domain : str
+		Domaine du filtre adapté : "time" (covariance et filtre `fg`, défaut) ou "frequency"
+		(blanchiment par la PSD, sans matrice de covariance).
 	time_th : float
 		Temps théorique du signal.
 	time_gen : numpy.ndarray
@@ -41,28 +50,51 @@ class BruitColore:
 		Données simulées avec bruit.
 	cov : numpy.ndarray
 		Matrice de covariance du bruit.
+	acf : numpy.ndarray
+		Autocovariance du bruit (première ligne de `cov`), None en mode "montecarlo".
 	model : numpy.ndarray
 		Modèle de signal utilisé pour la détection.
 	fg : numpy.ndarray
 		Filtre de détection.
 	snr : numpy.ndarray
 		Rapport signal-bruit (SNR).
+	rng : numpy.random.Generator
+		Générateur de nombres aléatoires de la simulation (voir `rng.generator`).
+
+	Les grandeurs dérivées (`time_gen`, `signal`, `psd`, `cov`, `acf`, `model`, `fg`, `snr`) sont
+	calculées au premier accès et recalculées seulement quand une de leurs entrées change (voir
+	`lazy`) : par exemple, changer `gamma` invalide la PSD, la covariance, le filtre et le SNR,
+	mais pas le modèle. Le bruit puis la position du signal sont tirés à la construction avec le
+	générateur `rng`, et les 1000 bruits de la covariance "montecarlo" au premier accès à `cov`.
 	"""
+
+    gamma = lazy.Input()
+    cov_mode = lazy.Input()
+    domain = lazy.Input()
+    bruit = lazy.Input()
+    data = lazy.Input()
+    time_gen = lazy.Derived("_time_gen")
+    signal = lazy.Derived("_signal", ("time_gen",))
+    psd = lazy.Derived("PSD", ("time_gen", "gamma"))
+    cov = lazy.Derived("_covariance", ("time_gen", "gamma", "cov_mode"))
+    acf = lazy.Derived("_covariance", ("time_gen", "gamma", "cov_mode"))
+    model = lazy.Derived("_model", ("time_gen",))
+    fg = lazy.Derived("_filter_g", ("cov", "acf", "model"))
+    _plan = lazy.Derived(lambda self: co.TemplatePlan(self.fg), ("fg",))
+    snr = lazy.Derived("SNR", ("bruit", "data", "fg", "model", "psd", "domain"))
     
-    def __init__(self, gamma=1.2, opt=False):
+    def __init__(self, gamma=1.2, opt=False, cov_mode="exact", domain="time", rng=None):
         
+        if cov_mode not in ("exact", "montecarlo"):
+            raise ValueError(f"Mode de covariance inconnu : {cov_mode}.")
+        if domain not in ("time", "frequency"):
+            raise ValueError(f"Domaine inconnu : {domain}.")
+        self.rng = rg.generator(rng)
         self.gamma = gamma
-        self.opt = opt        
+        self.opt = opt
+        self.cov_mode = cov_mode
+        self.domain = domain
         self.time_th = None
-        self.time_gen = None
-        self.signal = None
-        self.psd = None
-        self.bruit = None
-        self.data = None
-        self.cov = None
-        self.model = None
-        self.fg = None
-        self.snr = None        
         self.compile_data()
                 
     def Main(self):
@@ -82,6 +114,13 @@ class BruitColore:
 			Exposant pour la densité spectrale de puissance (PSD).
 		opt : bool, optionnel (défaut = False)
 			Indicateur de l'option de performance (utilise `True` pour une version optimisée).
+		cov_mode : str, optionnel (défaut = "exact")
+			Calcul de la covariance : "exact" à partir de la PSD, ou "montecarlo" par moyenne
+			sur 1000 tirages de bruit.
+		domain : str, optionnel (défaut = "time")
+			Domaine du filtre adapté : "time" ou "frequency".
+		rng : None, int, SeedSequence ou Generator, optionnel (défaut = None)
+			Graine ou générateur des tirages aléatoires ; None utilise l'entropie du système.
 		"""
         
         self.Detection()
@@ -90,15 +129,18 @@ class BruitColore:
         self.TimeTracker()
         self.CarbonTracker()
         
+    @timed
     def compile_data(self):
         """
 		Compile toutes les données nécessaires pour les simulations.
 
 		Description :
 		-------------
-		Cette méthode appelle toutes les fonctions nécessaires pour générer et préparer
-		les différentes données : signal, PSD, bruit coloré, données simulées, covariance,
-		modèle de signal, filtre de détection, et rapport signal-bruit (SNR).
+		Cette méthode tire le bruit coloré puis la position du signal dans les données simulées
+		(ce qui calcule au passage l'échelle de temps, le signal et la PSD). La covariance, le
+		modèle, le filtre de détection et le rapport signal-bruit (SNR) sont calculés au premier
+		accès ; la covariance et le filtre ne le sont jamais dans le domaine "frequency" si l'on
+		n'y accède pas.
 
 		Paramètres :
 		------------
@@ -109,15 +151,8 @@ class BruitColore:
 		Aucun.
 		"""
         
-        self._time_gen()
-        self._signal()
-        self.PSD()
         self._bruit_colore()
         self._simulate_data()
-        self._covariance()
-        self._model()
-        self._filter_g()
-        self.SNR()
         
     def TurnOpt(self):
         """
@@ -145,9 +180,10 @@ class BruitColore:
 
 		Description :
 		-------------
-		Cette méthode met à jour la valeur de `gamma`, puis appelle les méthodes nécessaires
-		pour recalculer la PSD, la covariance, le modèle, le filtre de détection, et le rapport
-		signal-bruit (SNR).
+		Cette méthode met à jour la valeur de `gamma`. La PSD, la covariance, le filtre de détection
+		et le rapport signal-bruit (SNR), qui en dépendent, seront recalculés au prochain accès ; le
+		modèle, qui n'en dépend pas, est conservé. Dans le domaine "frequency", seuls la PSD et le
+		SNR sont recalculés.
 
 		Paramètres :
 		------------
@@ -160,11 +196,6 @@ class BruitColore:
 		"""
         
         self.gamma = gamma
-        self.PSD()
-        self._covariance()
-        self._model()
-        self._filter_g()
-        self.SNR()
         
     def _update_SNR(self):
         """
@@ -279,6 +310,7 @@ class BruitColore:
         
         return np.fft.fft(self.signal)
     
+    @timed
     def PSD(self, cov = False):
         """
 		Calcule la densité spectrale de puissance (PSD).
@@ -313,7 +345,7 @@ class BruitColore:
             psd = np.insert(psd, 0, psd[0])
             return np.concatenate((psd, psd[::-1]))
 
-    def _bruit_blanc(self, n=1000):
+    def _bruit_blanc(self, n=1000, rng=None):
         """
 		Génère un bruit blanc gaussien.
 
@@ -323,8 +355,10 @@ class BruitColore:
 
 		Paramètres :
 		------------
-		n : int, optionnel (défaut = 1000)
-			Le nombre d'échantillons à générer.
+		n : int ou tuple, optionnel (défaut = 1000)
+			Le nombre d'échantillons à générer (ou la forme du tableau).
+		rng : None, int, SeedSequence ou Generator, optionnel (défaut = None)
+			Flux aléatoire à utiliser ; par défaut le générateur `rng` de l'objet.
 
 		Retourne :
 		----------
@@ -332,8 +366,10 @@ class BruitColore:
 			Un tableau numpy contenant un bruit blanc gaussien de taille `n`.
 		"""
         
-        return np.random.normal(size=n)
+        rng = self.rng if rng is None else rg.generator(rng)
+        return rng.normal(size=n)
 
+    @timed
     def _bruit_colore(self, n=1000):
         """
 		Génère un bruit coloré.
@@ -364,6 +400,31 @@ class BruitColore:
             psd = np.sqrt(self.PSD(cov=True))
             bc = bb * psd
             return np.real(np.fft.ifft(bc))
+
+    def _bruit_colore_batch(self, n_trials, rng=None):
+        """
+		Génère plusieurs réalisations indépendantes du bruit coloré.
+
+		Description :
+		-------------
+		Même construction que `_bruit_colore`, appliquée ligne par ligne avec des FFT sur tout
+		le tableau.
+
+		Paramètres :
+		------------
+		n_trials : int
+			Nombre de réalisations.
+		rng : None, int, SeedSequence ou Generator, optionnel (défaut = None)
+			Flux aléatoire à utiliser ; par défaut le générateur `rng` de l'objet.
+
+		Retourne :
+		----------
+		numpy.ndarray
+			Tableau de forme (n_trials, 1000), une réalisation par ligne.
+		"""
+        
+        bb = np.fft.fft(self._bruit_blanc((n_trials, self.psd.size), rng), axis=-1)
+        return np.real(np.fft.ifft(bb * np.sqrt(self.psd), axis=-1))
     
     def _simulate_data(self):
         """
@@ -387,19 +448,28 @@ class BruitColore:
         s = self.signal
         n = len(bc) - len(s)
         sd = np.zeros(n)
-        n = np.random.randint(n)
+        n = self.rng.integers(n)
         self.time_th = self.time_gen[n]
         self.data = np.insert(sd, n, s) + bc
     
+    @timed
     def _covariance(self):
         """
 		Calcule la matrice de covariance du bruit.
 
 		Description :
 		-------------
-		Cette méthode génère un bruit coloré à l'aide de la fonction `bruit_colore` et calcule
-		la matrice de covariance en effectuant une moyenne sur 1000 échantillons de bruit. La matrice
-		est utilisée pour le filtrage et l'analyse du bruit dans le modèle.
+		En mode "exact", la covariance est calculée directement à partir de la PSD. Le bruit de
+		`_bruit_colore` est la partie réelle de `ifft(fft(w) * sqrt(PSD))` : c'est un bruit blanc
+		filtré par un noyau circulaire réel, dont la fonction de transfert est la partie paire
+		de `sqrt(PSD)`. L'autocovariance est la transformée inverse du carré de cette fonction
+		de transfert, et la matrice est circulante (donc Toeplitz). Pour une PSD à symétrie
+		hermitienne, on retrouve simplement `ifft(PSD)`.
+
+		En mode "montecarlo", cette méthode génère un bruit coloré à l'aide de la fonction
+		`bruit_colore` et calcule la matrice de covariance en effectuant une moyenne sur 1000
+		échantillons de bruit. La matrice est utilisée pour le filtrage et l'analyse du bruit dans
+		le modèle.
 
 		Paramètres :
 		------------
@@ -407,16 +477,26 @@ class BruitColore:
 
 		Retourne :
 		----------
-		Aucun. La matrice de covariance est stockée dans l'attribut `cov`.
+		Aucun. La matrice de covariance est stockée dans l'attribut `cov`, et l'autocovariance
+		dans l'attribut `acf` (mode "exact" uniquement).
 		"""
         
-        b = self._bruit_colore(100)
-        s = np.zeros((b.size, b.size))
-    
-        for _ in range(1000):
+        if self.cov_mode == "montecarlo":
             b = self._bruit_colore(100)
-            s += np.outer(b, b)
-        self.cov = s / 1000
+            s = np.zeros((b.size, b.size))
+        
+            for _ in range(1000):
+                b = self._bruit_colore(100)
+                s += np.outer(b, b)
+            self.cov = s / 1000
+            self.acf = None
+        elif self.cov_mode == "exact":
+            h = np.sqrt(self.PSD(cov=True))
+            h = (h + np.roll(h[::-1], 1)) / 2
+            self.acf = np.real(np.fft.ifft(h**2))
+            self.cov = sp.linalg.toeplitz(self.acf)
+        else:
+            raise ValueError(f"Mode de covariance inconnu : {self.cov_mode}.")
 
     def _model(self):
         """
@@ -441,6 +521,7 @@ class BruitColore:
         f = 5*t
         self.model = a * np.sin(2*np.pi*f*t)
 
+    @timed
     def _filter_g(self):
         """
 		Calcule le filtre adapté pour la détection du signal.
@@ -448,8 +529,10 @@ class BruitColore:
 		Description :
 		-------------
 		Cette méthode calcule le filtre `fg` qui est utilisé pour détecter le signal dans les données
-		simulées. Elle inverse la matrice de covariance et effectue une multiplication matricielle
-		pour obtenir le filtre.
+		simulées, en résolvant directement `cov @ fg = model` sans former l'inverse de la covariance.
+		Si l'autocovariance `acf` est connue (bruit stationnaire, covariance Toeplitz), le système
+		est résolu par l'algorithme de Levinson-Durbin en O(n²). Sinon, on utilise une factorisation
+		de Cholesky, avec repli sur une résolution LU si la matrice estimée n'est pas définie positive.
 
 		Paramètres :
 		------------
@@ -460,9 +543,34 @@ class BruitColore:
 		Aucun. Le filtre est stocké dans l'attribut `fg`.
 		"""
         
-        I = np.eye(self.cov.shape[0])
-        cov_inv = np.linalg.solve(self.cov, I)
-        self.fg = np.matmul(cov_inv, self.model)
+        if self.acf is not None:
+            self.fg = sp.linalg.solve_toeplitz(self.acf, self.model)
+        else:
+            try:
+                self.fg = sp.linalg.cho_solve(sp.linalg.cho_factor(self.cov), self.model)
+            except np.linalg.LinAlgError:
+                self.fg = np.linalg.solve(self.cov, self.model)
+
+    def _template_plan(self):
+        """
+		Retourne le plan de corrélation associé au filtre courant.
+
+		Description :
+		-------------
+		Le spectre du filtre `fg` est calculé au premier appel puis réutilisé par tous les calculs
+		du SNR, jusqu'à ce que le filtre change (par exemple via `_update_gamma`).
+
+		Paramètres :
+		------------
+		Aucun.
+
+		Retourne :
+		----------
+		correlation.TemplatePlan
+			Plan de corrélation du filtre.
+		"""
+        
+        return self._plan
 
     def _correlation(self, vector_data):
         """
@@ -472,7 +580,9 @@ class BruitColore:
 		-------------
 		Cette méthode calcule la corrélation entre le vecteur de données et le filtre `fg` pour estimer
 		la présence du signal dans les données bruitées. La corrélation est calculée par une somme des
-		produits de convolution.
+		produits de convolution, sur les décalages `range(N - N_g)`, à partir du plan de corrélation
+		du filtre (voir `_template_plan`) qui choisit automatiquement entre vue glissante, corrélation
+		directe et FFT overlap-save.
 
 		Paramètres :
 		------------
@@ -485,16 +595,7 @@ class BruitColore:
 			Un tableau contenant la corrélation calculée entre le filtre et les données.
 		"""
         
-        f_g = self.fg
-        N_g = np.size(f_g)
-        d = vector_data
-        N = np.size(d)
-        l = []
-
-        for i in range(N-N_g):
-            l.append(np.sum(f_g * d[i:i+N_g]))
-
-        return np.array(l)
+        return self._template_plan().correlate(vector_data)
     
     def _correlation_scipy(self, vector_data):
         """
@@ -518,6 +619,7 @@ class BruitColore:
         
         return sp.signal.correlate(vector_data, self.fg)
 
+    @timed
     def SNR(self):
         """
 		Calcule le rapport signal-bruit (SNR) pour les données simulées.
@@ -526,6 +628,8 @@ class BruitColore:
 		-------------
 		Cette méthode calcule le rapport signal-bruit (SNR) en effectuant une corrélation entre le bruit
 		et les données. Le SNR est calculé pour évaluer la présence du signal par rapport au bruit.
+		Dans le domaine "frequency", les données sont blanchies par la PSD et le SNR est normalisé par
+		le SNR optimal du modèle (voir `correlation.whitened_snr`).
 
 		Paramètres :
 		------------
@@ -536,6 +640,10 @@ class BruitColore:
 		Aucun. Le SNR est stocké dans l'attribut `snr`.
 		"""
         
+        if self.domain == "frequency":
+            self.snr = co.whitened_snr(self.model, self.data, self.psd)
+            return
+
         if self.opt:
             tau_bruit = self._correlation_scipy(self.bruit)
             tau_obs = self._correlation_scipy(self.data)
@@ -545,6 +653,34 @@ class BruitColore:
 
         sigma_bruit = np.std(tau_bruit)
         self.snr = tau_obs / sigma_bruit
+
+    def SNRBatch(self, bruits):
+        """
+		Calcule le SNR pour un lot de réalisations du bruit coloré.
+
+		Description :
+		-------------
+		Le signal injecté dans `data` (à la même position) est ajouté à chaque ligne de `bruits`,
+		puis les corrélations avec le filtre `fg` sont calculées par FFT sur tout le tableau (voir
+		`correlation.snr_batch`). Cela évite de construire un objet par tirage Monte Carlo. Dans le
+		domaine "frequency", le SNR blanchi est calculé de la même façon sur tout le tableau.
+
+		Paramètres :
+		------------
+		bruits : numpy.ndarray
+			Tableau 2-D des réalisations du bruit (une par ligne), par exemple `_bruit_colore_batch(n)`.
+
+		Retourne :
+		----------
+		tuple
+			`(snr, p0, snr_max)` : SNR de chaque essai, position et valeur de son maximum.
+		"""
+        
+        if self.domain == "frequency":
+            snr = co.whitened_snr(self.model, (self.data - self.bruit) + np.atleast_2d(bruits), self.psd)
+            p0 = np.argmax(snr, axis=-1)
+            return snr, p0, snr[np.arange(snr.shape[0]), p0]
+        return co.snr_batch(self._template_plan(), self.data - self.bruit, bruits)
     
     def Detection(self):
         """
@@ -562,8 +698,9 @@ class BruitColore:
 
 		Retourne :
 		----------
-		Aucun. Affiche un message indiquant la position du signal et l'heure à laquelle il est détecté,
-		ou un message indiquant qu'aucun signal n'a été détecté.
+		int ou None
+			La position du signal détecté, ou None. Affiche un message indiquant la position du signal
+			et l'heure à laquelle il est détecté, ou un message indiquant qu'aucun signal n'a été détecté.
 		"""
         
         p0 = np.argmax(self.snr)
@@ -572,8 +709,37 @@ class BruitColore:
             d = self.time_gen
             time_max = d[p0]
             print(f'Signal detecte en t = {time_max} s.\nLe signal doit se trouver a t_th = {self.time_th} s.')
+            return int(p0)
         else:
             print("Aucun signal detectee.")
+            return None
+
+    def Triggers(self, threshold=3.0, window=None):
+        """
+		Extrait tous les déclenchements du SNR, et pas seulement son maximum.
+
+		Description :
+		-------------
+		Les instants où le SNR dépasse le seuil sont regroupés par fenêtres de temps ; seul le plus
+		fort de chaque fenêtre est gardé, ce qui permet de trouver plusieurs signaux dans les données.
+
+		Paramètres :
+		------------
+		threshold : float, optionnel (défaut = 3.0)
+			Seuil de détection, comme dans `Detection`.
+		window : float, optionnel (défaut = None)
+			Durée de la fenêtre de regroupement (en secondes) ; par défaut la durée du modèle.
+
+		Retourne :
+		----------
+		numpy.ndarray
+			Tableau structuré (time, snr, phase, template_id) des déclenchements.
+		"""
+        
+        h = self.time_gen[1] - self.time_gen[0]
+        if window is None:
+            window = len(self.model) * h
+        return tr.cluster(self.snr, threshold, window, h, self.time_gen[0])
         
     def TimeTracker(self):
         """
@@ -590,13 +756,16 @@ class BruitColore:
 
 		Retourne :
 		----------
-		Aucun. Affiche le temps d'exécution pour les deux cas d'optimisation.
+		dict
+			Temps d'exécution (en secondes) pour chaque valeur de `opt`, aussi affiché.
 		"""
         
+        timings = {}
         start_time = time.time()
         for _ in range(1000):
             self._update_SNR()
         end_time = time.time()
+        timings[self.opt] = end_time - start_time
         print(f"Temps d'execution pour opt = {self.opt} : {end_time - start_time} secondes.")
 
         self.TurnOpt()
@@ -605,7 +774,9 @@ class BruitColore:
         for _ in range(1000):
             self._update_SNR()
         end_time = time.time()
+        timings[self.opt] = end_time - start_time
         print(f"Temps d'execution pour opt = {self.opt} : {end_time - start_time} secondes.")
+        return timings
 
     def CarbonTracker(self):
         """
@@ -625,7 +796,8 @@ class BruitColore:
 		----------
 		Aucun. Affiche les émissions de CO2 pour les deux cas d'optimisation.
 		"""
-        
+        import codecarbon as cc
+
         tracker = cc.EmissionsTracker(save_to_file=False)
         tracker.start()
         for _ in range(1000):
@@ -642,7 +814,7 @@ class BruitColore:
         emission = tracker.stop()
         print(f"CO2 generer pour opt = {self.opt} : {emission} kg.")
 
-    def PlotAll(self):
+    def PlotAll(self, show=True):
         """
 		Trace tous les graphiques sur une seule page avec des subplots.
 
@@ -655,12 +827,17 @@ class BruitColore:
 
 		Paramètres :
 		------------
-		Aucun.
+		show : bool, optionnel (défaut = True)
+			Affiche la fenêtre interactive. En mode batch, la figure est seulement retournée pour
+			être enregistrée.
 
 		Retourne :
 		----------
-		Aucun. Affiche les graphiques sur une fenêtre.
+		Figure
+			La figure matplotlib, affichée sur une fenêtre si `show` est vrai.
 		"""
+        import matplotlib.pyplot as plt
+
         fig, axs = plt.subplots(3, 3, figsize=(16, 9))  # Crée une grille 3x3
         axs = axs.ravel()  # Aplatir le tableau des axes pour un accès facile
 
@@ -705,4 +882,6 @@ class BruitColore:
 
 		# Ajuster l'espacement entre les sous-graphiques
         plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        if show:
+            plt.show()
+        return fig
\ No newline at end of file
@@ -0,0 +1,328 @@
+from collections import OrderedDict
+import numpy as np
+import glob
+import hashlib
+import json
+import os
+
+version = "1.0"
+
+
+def default_directory():
+    """
+    Retourne le dossier de cache par défaut.
+
+    Description :
+    -------------
+    Le dossier est donné par la variable d'environnement `TP1_CACHE_DIR`, ou à défaut
+    `~/.cache/tp1_pkg`.
+
+    Retourne :
+    ----------
+    str
+        Chemin du dossier de cache.
+    """
+    return os.environ.get("TP1_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tp1_pkg"))
+
+
+def _write_json(path, content):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(content, f)
+    os.replace(tmp, path)
+
+
+def _write_npy(path, array):
+    tmp = path + ".tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+class StrainCache:
+    """
+    Cache local des séries temporelles de contraintes (strain) des événements.
+
+    Description :
+    -------------
+    Chaque série est stockée sous la forme d'un fichier `.npy` (mémoire projetable) accompagné
+    d'un fichier `.json` de métadonnées (événement, détecteur, fréquence d'échantillonnage,
+    durée, temps GPS de début). La clé est (événement, détecteur, fréquence d'échantillonnage,
+    durée). En mode hors ligne, aucun téléchargement n'est tenté.
+
+    Attributs :
+    -----------
+        directory : str
+        	Dossier racine du cache.
+        offline : bool
+        	Interdit tout téléchargement si True (par défaut, variable d'environnement `TP1_OFFLINE`).
+    """
+
+    def __init__(self, directory=None, offline=None):
+
+        self.directory = directory or default_directory()
+        if offline is None:
+            offline = os.environ.get("TP1_OFFLINE", "") not in ("", "0")
+        self.offline = offline
+
+    def _stem(self, event, detector, sample_rate, duration):
+        name = f"{event}_{detector}_{int(round(sample_rate))}Hz_{duration:g}s"
+        return os.path.join(self.directory, "strain", name)
+
+    def find(self, event, detector, sample_rate=None, duration=None):
+        """
+        Cherche une série en cache.
+
+        Paramètres :
+        ------------
+        event : str
+            Nom de l'événement (ex. "GW150914").
+        detector : str
+            Nom du détecteur (ex. "H1").
+        sample_rate : float, optionnel (défaut = None)
+            Fréquence d'échantillonnage (en Hz) ; None accepte n'importe quelle valeur.
+        duration : float, optionnel (défaut = None)
+            Durée (en secondes) ; None accepte n'importe quelle valeur.
+
+        Retourne :
+        ----------
+        dict ou None
+            Métadonnées de la série trouvée (avec le chemin du fichier `.npy`), ou None.
+        """
+        pattern = os.path.join(self.directory, "strain", f"{event}_{detector}_*.json")
+        for path in sorted(glob.glob(pattern)):
+            with open(path) as f:
+                meta = json.load(f)
+            if meta["event"] != event or meta["detector"] != detector:
+                continue
+            if sample_rate is not None and not np.isclose(meta["sample_rate"], sample_rate):
+                continue
+            if duration is not None and not np.isclose(meta["duration"], duration):
+                continue
+            meta["path"] = path[:-len(".json")] + ".npy"
+            return meta
+        return None
+
+    def load(self, event, detector, sample_rate=None, duration=None, mmap=True):
+        """
+        Charge une série depuis le cache.
+
+        Paramètres :
+        ------------
+        event : str
+            Nom de l'événement.
+        detector : str
+            Nom du détecteur.
+        sample_rate : float, optionnel (défaut = None)
+            Fréquence d'échantillonnage recherchée.
+        duration : float, optionnel (défaut = None)
+            Durée recherchée.
+        mmap : bool, optionnel (défaut = True)
+            Projette le fichier en mémoire au lieu de le lire entièrement.
+
+        Retourne :
+        ----------
+        TimeSeries ou None
+            La série, ou None si elle n'est pas en cache.
+        """
+        from pycbc.types import TimeSeries
+
+        meta = self.find(event, detector, sample_rate, duration)
+        if meta is None:
+            return None
+        data = np.load(meta["path"], mmap_mode="r" if mmap else None)
+        return TimeSeries(data, delta_t=1.0 / meta["sample_rate"], epoch=meta["start_time"], copy=not mmap)
+
+    def store(self, event, detector, data, delta_t, start_time):
+        """
+        Enregistre une série dans le cache.
+
+        Description :
+        -------------
+        Accepte un simple tableau numpy, ce qui permet de pré-remplir le cache avec des données
+        synthétiques (par exemple dans un test), sans accès au réseau.
+
+        Paramètres :
+        ------------
+        event : str
+            Nom de l'événement.
+        detector : str
+            Nom du détecteur.
+        data : numpy.ndarray
+            Échantillons de la série.
+        delta_t : float
+            Intervalle de temps entre deux échantillons (en secondes).
+        start_time : float
+            Temps GPS du premier échantillon.
+
+        Retourne :
+        ----------
+        str
+            Chemin du fichier `.npy` écrit.
+        """
+        data = np.asarray(data)
+        sample_rate = 1.0 / delta_t
+        duration = len(data) * delta_t
+        stem = self._stem(event, detector, sample_rate, duration)
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        _write_npy(stem + ".npy", data)
+        _write_json(stem + ".json", {
+            "event": event,
+            "detector": detector,
+            "sample_rate": sample_rate,
+            "duration": duration,
+            "start_time": float(start_time),
+        })
+        return stem + ".npy"
+
+    def fetch(self, event, detector, download, sample_rate=None, duration=None):
+        """
+        Retourne la série en cache, ou la télécharge puis l'enregistre.
+
+        Paramètres :
+        ------------
+        event : str
+            Nom de l'événement.
+        detector : str
+            Nom du détecteur.
+        download : callable
+            Fonction sans argument retournant la série (TimeSeries) en cas d'absence du cache.
+        sample_rate : float, optionnel (défaut = None)
+            Fréquence d'échantillonnage recherchée.
+        duration : float, optionnel (défaut = None)
+            Durée recherchée.
+
+        Retourne :
+        ----------
+        TimeSeries
+            La série de contraintes.
+        """
+        strain = self.load(event, detector, sample_rate, duration)
+        if strain is not None:
+            return strain
+        if self.offline:
+            raise FileNotFoundError(f"Donnees {event}/{detector} absentes du cache {self.directory} (mode hors ligne).")
+        strain = download()
+        self.store(event, detector, strain.numpy(), strain.delta_t, float(strain.start_time))
+        return strain
+
+
+def strain_cache(cache):
+    """
+    Interprète l'argument `cache` des classes d'analyse.
+
+    Paramètres :
+    ------------
+    cache : StrainCache, bool ou None
+        None ou True pour un `StrainCache()` dans le dossier par défaut, False pour désactiver
+        le cache, ou un cache déjà construit.
+
+    Retourne :
+    ----------
+    StrainCache ou None
+        Le cache à utiliser, None si désactivé.
+    """
+    if cache is None or cache is True:
+        return StrainCache()
+    return cache or None
+
+
+class WaveformCache:
+    """
+    Cache des modèles de formes d'onde dans le domaine fréquentiel, adressé par leur contenu.
+
+    Description :
+    -------------
+    La clé d'un modèle est l'empreinte SHA-256 de ses paramètres (approximant, masses,
+    fréquence minimale, pas de temps, durée, longueur). Les modèles récemment utilisés sont
+    gardés en mémoire (LRU) ; si un dossier est donné, ils sont aussi enregistrés sur disque
+    et partagés entre exécutions et détecteurs.
+
+    Attributs :
+    -----------
+        maxsize : int
+        	Nombre maximal de modèles gardés en mémoire.
+        directory : str ou None
+        	Dossier du cache sur disque (None pour un cache uniquement en mémoire).
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+
+        self.maxsize = maxsize
+        self.directory = directory
+        self._memory = OrderedDict()
+
+    @staticmethod
+    def key(params):
+        """
+        Calcule la clé d'un modèle à partir de ses paramètres.
+
+        Paramètres :
+        ------------
+        params : dict
+            Paramètres du modèle (valeurs sérialisables en JSON).
+
+        Retourne :
+        ----------
+        str
+            Empreinte SHA-256 hexadécimale.
+        """
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, "waveforms", key)
+
+    def _load(self, key):
+        from pycbc.types import FrequencySeries
+
+        path = self._path(key)
+        if not os.path.exists(path + ".json"):
+            return None
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        return FrequencySeries(np.load(path + ".npy"), delta_f=meta["delta_f"], epoch=meta["epoch"])
+
+    def _save(self, key, params, htilde):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_npy(path + ".npy", htilde.numpy())
+        _write_json(path + ".json", {"params": params, "delta_f": htilde.delta_f, "epoch": float(htilde.epoch)})
+
+    def get(self, params, factory):
+        """
+        Retourne le modèle correspondant aux paramètres, en le générant si nécessaire.
+
+        Paramètres :
+        ------------
+        params : dict
+            Paramètres du modèle, qui déterminent la clé.
+        factory : callable
+            Fonction sans argument générant le modèle (FrequencySeries) en cas d'absence du cache.
+
+        Retourne :
+        ----------
+        FrequencySeries
+            Le modèle dans le domaine fréquentiel.
+        """
+        key = self.key(params)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        htilde = self._load(key) if self.directory else None
+        if htilde is None:
+            htilde = factory()
+            if self.directory:
+                self._save(key, params, htilde)
+        self._memory[key] = htilde
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+        return htilde
+
+    def clear(self):
+        """
+        Vide le cache en mémoire (le cache sur disque est conservé).
+
+        Retourne :
+        ----------
+        Aucun.
+        """
+        self._memory.clear()
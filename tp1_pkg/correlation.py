@@ -0,0 +1,372 @@
+import numpy as np
+import scipy as sp
+
+version = "1.0"
+
+# Seuils utilises par le choix automatique de la methode de correlation.
+_DIRECT_MAX_TEMPLATE = 128
+_DIRECT_MAX_OPS = 1 << 17
+_STRIDED_MAX_TEMPLATE = 16
+_FFT_MAX_SINGLE_BLOCK = 1 << 16
+
+
+def n_lags(n_template, n_data):
+    """
+    Nombre de décalages calculés par la corrélation "valide" du projet.
+
+    Description :
+    -------------
+    La boucle manuelle historique parcourt `range(N - N_g)` : le dernier décalage possible
+    (N - N_g) n'est pas calculé. Toutes les méthodes de ce module conservent cette convention
+    afin que les positions restent cohérentes avec `Detection` et `_redshift`.
+
+    Paramètres :
+    ------------
+    n_template : int
+        Longueur du modèle (ou du filtre).
+    n_data : int
+        Longueur de la série de données.
+
+    Retourne :
+    ----------
+    int
+        Nombre de décalages, éventuellement nul.
+    """
+
+    return max(n_data - n_template, 0)
+
+
+def choose_method(n_template, n_data, batch=False):
+    """
+    Choisit la méthode de corrélation la plus rapide selon les longueurs en jeu.
+
+    Description :
+    -------------
+    - "direct" : `np.correlate`, pour une série unique et un modèle court (ou peu d'opérations).
+    - "strided" : produit matriciel sur une vue glissante des données, pour un lot de séries
+      (une série par ligne) et un modèle très court.
+    - "fft" : overlap-save par FFT pour les modèles longs et pour les lots de séries.
+
+    Paramètres :
+    ------------
+    n_template : int
+        Longueur du modèle.
+    n_data : int
+        Longueur de la série de données.
+    batch : bool, optionnel (défaut = False)
+        Indique si les données contiennent plusieurs séries.
+
+    Retourne :
+    ----------
+    str
+        "direct", "strided" ou "fft".
+    """
+
+    if batch:
+        return "strided" if n_template <= _STRIDED_MAX_TEMPLATE else "fft"
+    ops = n_lags(n_template, n_data) * n_template
+    if ops <= _DIRECT_MAX_OPS or n_template <= _DIRECT_MAX_TEMPLATE:
+        return "direct"
+    return "fft"
+
+
+def fft_size(n_template, n_data):
+    """
+    Taille de FFT utilisée par l'overlap-save.
+
+    Description :
+    -------------
+    Pour des données de taille raisonnable, un seul bloc couvrant toute la série suffit. Pour
+    les longues séries, on utilise des blocs d'une puissance de deux au moins huit fois plus
+    longs que le modèle.
+
+    Paramètres :
+    ------------
+    n_template : int
+        Longueur du modèle.
+    n_data : int
+        Longueur de la série de données.
+
+    Retourne :
+    ----------
+    int
+        Taille de la FFT.
+    """
+
+    if n_data <= _FFT_MAX_SINGLE_BLOCK:
+        return sp.fft.next_fast_len(n_data, real=True)
+    return max(_FFT_MAX_SINGLE_BLOCK, 1 << int(np.ceil(np.log2(8 * n_template))))
+
+
+def _correlation_strided(template, data, m):
+    windows = np.lib.stride_tricks.sliding_window_view(data, template.size, axis=-1)
+    return windows[..., :m, :] @ template
+
+
+def _correlation_direct(template, data, m):
+    if data.ndim > 1:
+        return _correlation_strided(template, data, m)
+    return np.correlate(data, template, mode="valid")[:m]
+
+
+def _overlap_save(spectrum, n_template, data, m, nfft):
+    """
+    Corrélation par overlap-save à partir du spectre conjugué du modèle.
+
+    Paramètres :
+    ------------
+    spectrum : numpy.ndarray
+        `conj(rfft(modèle, nfft))`, 1-D ou 2-D (un modèle par ligne).
+    n_template : int
+        Longueur du modèle.
+    data : numpy.ndarray
+        Données, 1-D ou 2-D (une série par ligne).
+    m : int
+        Nombre de décalages à calculer.
+    nfft : int
+        Taille des blocs FFT.
+
+    Retourne :
+    ----------
+    numpy.ndarray
+        Corrélations, de forme `broadcast(spectrum.shape[:-1], data.shape[:-1]) + (m,)`.
+    """
+
+    step = nfft - n_template + 1
+    out = np.empty(np.broadcast_shapes(spectrum.shape[:-1], data.shape[:-1]) + (m,))
+    for start in range(0, m, step):
+        seg = data[..., start:start + nfft]
+        c = np.fft.irfft(np.fft.rfft(seg, nfft) * spectrum, nfft)
+        k = min(step, m - start)
+        out[..., start:start + k] = c[..., :k]
+    return out
+
+
+def _correlation_fft(template, data, m):
+    nfft = fft_size(template.size, data.shape[-1])
+    spectrum = np.conj(np.fft.rfft(template, nfft))
+    return _overlap_save(spectrum, template.size, data, m, nfft)
+
+
+_METHODS = {
+    "direct": _correlation_direct,
+    "strided": _correlation_strided,
+    "fft": _correlation_fft,
+}
+
+
+def correlate_valid(template, data, method="auto"):
+    """
+    Corrélation croisée entre un modèle et des données, aux décalages "valides".
+
+    Description :
+    -------------
+    Calcule `c[i] = sum_k template[k] * data[i + k]` pour `i` dans `range(N - N_g)`, c'est-à-dire
+    exactement les valeurs de la boucle manuelle des méthodes `_correlation`, mais sans boucle
+    Python.
+
+    Paramètres :
+    ------------
+    template : numpy.ndarray
+        Modèle (ou filtre) de longueur N_g.
+    data : numpy.ndarray
+        Série de données de longueur N, ou tableau 2-D contenant une série par ligne.
+    method : str, optionnel (défaut = "auto")
+        "auto", "direct", "strided" ou "fft".
+
+    Retourne :
+    ----------
+    numpy.ndarray
+        Série des corrélations pour chaque décalage (une ligne par série en entrée 2-D).
+    """
+
+    template = np.asarray(template, dtype=float)
+    data = np.asarray(data, dtype=float)
+    m = n_lags(template.size, data.shape[-1])
+    if m == 0:
+        return np.zeros(data.shape[:-1] + (0,))
+    if method == "auto":
+        method = choose_method(template.size, data.shape[-1], batch=data.ndim > 1)
+    if method not in _METHODS:
+        raise ValueError(f"Methode de correlation inconnue : {method}.")
+    return _METHODS[method](template, data, m)
+
+
+class TemplatePlan:
+    """
+    Plan de corrélation réutilisable pour un modèle fixe.
+
+    Description :
+    -------------
+    Le spectre conjugué du modèle complété par des zéros est calculé une seule fois par taille
+    de FFT, puis réutilisé à chaque corrélation. Une corrélation par FFT ne coûte alors qu'une
+    transformée directe et une transformée inverse par série de données. Le plan doit être
+    reconstruit dès que le modèle change.
+
+    Attributs :
+    -----------
+    template : numpy.ndarray
+        Copie du modèle (ou du filtre) corrélé avec les données.
+    """
+
+    def __init__(self, template):
+
+        self.template = np.array(template, dtype=float)
+        self._spectra = {}
+
+    def spectrum(self, nfft):
+        """
+        Retourne le spectre conjugué du modèle pour une taille de FFT donnée.
+
+        Paramètres :
+        ------------
+        nfft : int
+            Taille de la FFT.
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            `conj(rfft(template, nfft))`, calculé au premier appel puis mis en cache.
+        """
+
+        if nfft not in self._spectra:
+            self._spectra[nfft] = np.conj(np.fft.rfft(self.template, nfft))
+        return self._spectra[nfft]
+
+    def correlate(self, data, method="auto"):
+        """
+        Corrélation "valide" du modèle avec les données.
+
+        Paramètres :
+        ------------
+        data : numpy.ndarray
+            Série de données, ou tableau 2-D contenant une série par ligne.
+        method : str, optionnel (défaut = "auto")
+            "auto", "direct", "strided" ou "fft".
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            Mêmes valeurs que `correlate_valid(template, data, method)`.
+        """
+
+        data = np.asarray(data, dtype=float)
+        n_template = self.template.size
+        if method == "auto":
+            method = choose_method(n_template, data.shape[-1], batch=data.ndim > 1)
+        if method != "fft":
+            return correlate_valid(self.template, data, method)
+        m = n_lags(n_template, data.shape[-1])
+        if m == 0:
+            return np.zeros(data.shape[:-1] + (0,))
+        nfft = fft_size(n_template, data.shape[-1])
+        return _overlap_save(self.spectrum(nfft), n_template, data, m, nfft)
+
+
+def correlate_bank(templates, data):
+    """
+    Corrélation "valide" d'une série de données avec une pile de modèles.
+
+    Description :
+    -------------
+    Le spectre des données est calculé une seule fois et multiplié par les spectres de tous les
+    modèles à la fois (overlap-save pour les longues séries).
+
+    Paramètres :
+    ------------
+    templates : numpy.ndarray
+        Tableau 2-D des modèles (un modèle par ligne, tous de longueur N_g).
+    data : numpy.ndarray
+        Série de données de longueur N.
+
+    Retourne :
+    ----------
+    numpy.ndarray
+        Tableau de forme (nombre de modèles, N - N_g).
+    """
+
+    templates = np.atleast_2d(np.asarray(templates, dtype=float))
+    data = np.asarray(data, dtype=float)
+    n_template = templates.shape[-1]
+    m = n_lags(n_template, data.size)
+    if m == 0:
+        return np.zeros((templates.shape[0], 0))
+    nfft = fft_size(n_template, data.size)
+    spectra = np.conj(np.fft.rfft(templates, nfft, axis=-1))
+    return _overlap_save(spectra, n_template, data, m, nfft)
+
+
+def snr_batch(plan, signal, bruits, chunk=4096):
+    """
+    Calcule le SNR pour un lot de réalisations du bruit en une seule passe vectorisée.
+
+    Description :
+    -------------
+    Chaque ligne de `bruits` est une réalisation du bruit ; les données correspondantes sont
+    `signal + bruits[i]`. Par linéarité de la corrélation, `tau_obs = tau_signal + tau_bruit` :
+    la corrélation du signal est calculée une seule fois et seules les corrélations du bruit
+    sont calculées, par FFT sur tout le tableau. Le SNR de chaque ligne est normalisé par
+    l'écart-type de la corrélation de son propre bruit, comme dans les méthodes `SNR`.
+
+    Paramètres :
+    ------------
+    plan : TemplatePlan
+        Plan de corrélation du modèle (ou du filtre).
+    signal : numpy.ndarray
+        Signal injecté, de même longueur que les réalisations.
+    bruits : numpy.ndarray
+        Tableau 2-D des réalisations du bruit (une réalisation par ligne).
+    chunk : int, optionnel (défaut = 4096)
+        Nombre de lignes traitées par passe, pour borner la mémoire intermédiaire.
+
+    Retourne :
+    ----------
+    tuple
+        `(snr, p0, snr_max)` : tableau 2-D des SNR, position du maximum et valeur du maximum
+        pour chaque ligne.
+    """
+
+    bruits = np.atleast_2d(np.asarray(bruits, dtype=float))
+    tau_signal = plan.correlate(signal)
+    snr = np.empty((bruits.shape[0], tau_signal.size))
+    for start in range(0, bruits.shape[0], chunk):
+        tau_bruit = plan.correlate(bruits[start:start + chunk])
+        sigma_bruit = np.std(tau_bruit, axis=-1, keepdims=True)
+        snr[start:start + chunk] = (tau_signal + tau_bruit) / sigma_bruit
+    p0 = np.argmax(snr, axis=-1)
+    return snr, p0, snr[np.arange(snr.shape[0]), p0]
+
+
+def whitened_snr(template, data, psd):
+    """
+    Filtre adapté blanchi dans le domaine fréquentiel.
+
+    Description :
+    -------------
+    Les spectres des données et du modèle (complété par des zéros) sont divisés par la PSD du
+    bruit, corrélés dans le domaine fréquentiel, puis normalisés par le SNR optimal du modèle
+    `sigma² = sum(|T|² / PSD) / N`. Pour du bruit seul, le SNR obtenu est de variance unité.
+    Aucune matrice de covariance n'est construite : le coût est en O(N log N). Comme pour
+    `correlate_valid`, seuls les décalages `range(N - N_g)` sont retournés.
+
+    Paramètres :
+    ------------
+    template : numpy.ndarray
+        Modèle du signal, de longueur N_g.
+    data : numpy.ndarray
+        Série de données de longueur N, ou tableau 2-D contenant une série par ligne.
+    psd : numpy.ndarray
+        Densité spectrale de puissance du bruit, de longueur N, aux fréquences de `np.fft.fft`.
+
+    Retourne :
+    ----------
+    numpy.ndarray
+        SNR pour chaque décalage (une ligne par série en entrée 2-D).
+    """
+
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
+    spectrum = np.conj(np.fft.fft(template, n)) / psd
+    z = np.real(np.fft.ifft(np.fft.fft(data, axis=-1) * spectrum, axis=-1))
+    sigma = np.sqrt(np.sum(np.abs(spectrum)**2 * psd) / n)
+    return z[..., :n_lags(np.size(template), n)] / sigma
@@ -0,0 +1,130 @@
+version = "1.0"
+
+# Graphe des dépendances de chaque classe : nom -> noms des grandeurs qui en dépendent.
+_GRAPHS = {}
+
+
+def _graph(cls):
+    graph = _GRAPHS.get(cls)
+    if graph is None:
+        graph = {}
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                for dep in getattr(attr, "depends", ()) if isinstance(attr, Input) else ():
+                    graph.setdefault(dep, set()).add(name)
+        _GRAPHS[cls] = graph
+    return graph
+
+
+def invalidate(obj, *names):
+    """
+    Invalide toutes les grandeurs dérivées qui dépendent (même indirectement) de `names`.
+
+    Paramètres :
+    ------------
+    obj : object
+        Objet portant les grandeurs.
+    *names : str
+        Noms des grandeurs modifiées.
+
+    Retourne :
+    ----------
+    Aucun.
+    """
+    graph = _graph(type(obj))
+    seen = set()
+    stack = list(names)
+    while stack:
+        for dep in graph.get(stack.pop(), ()):
+            if dep not in seen:
+                seen.add(dep)
+                obj.__dict__.pop(dep, None)
+                stack.append(dep)
+
+
+def is_computed(obj, name):
+    """
+    Indique si une grandeur a une valeur à jour, sans la calculer.
+
+    Paramètres :
+    ------------
+    obj : object
+        Objet portant la grandeur.
+    name : str
+        Nom de la grandeur.
+
+    Retourne :
+    ----------
+    bool
+        True si la valeur est disponible.
+    """
+    return name in obj.__dict__
+
+
+class Input:
+    """
+    Attribut d'entrée suivi : toute nouvelle valeur invalide les grandeurs qui en dépendent.
+
+    Attributs :
+    -----------
+        name : str
+        	Nom de l'attribut.
+        depends : tuple
+        	Grandeurs dont dépend l'attribut (aucune pour une entrée).
+    """
+
+    depends = ()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+        invalidate(obj, self.name)
+
+    def __delete__(self, obj):
+        obj.__dict__.pop(self.name, None)
+        invalidate(obj, self.name)
+
+
+class Derived(Input):
+    """
+    Grandeur dérivée, calculée au premier accès et gardée jusqu'à ce qu'une de ses entrées change.
+
+    Description :
+    -------------
+    Au premier accès, la méthode `compute` de l'objet est appelée. Elle peut affecter elle-même
+    l'attribut (comme les méthodes `_model`, `PSD`, ... qui écrivent `self.model`, `self.psd`)
+    ou retourner la valeur. Une affectation explicite remplace la valeur et invalide à son tour
+    les grandeurs qui en dépendent ; appeler directement la méthode force donc le recalcul.
+
+    Attributs :
+    -----------
+        compute : str ou callable
+        	Nom de la méthode de calcul, ou fonction prenant l'objet en argument.
+        depends : tuple
+        	Noms des attributs (entrées ou grandeurs dérivées) utilisés par le calcul.
+    """
+
+    def __init__(self, compute, depends=()):
+
+        self.compute = compute
+        self.depends = tuple(depends)
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        values = obj.__dict__
+        if self.name not in values:
+            result = getattr(obj, self.compute)() if isinstance(self.compute, str) else self.compute(obj)
+            if self.name not in values:
+                values[self.name] = result
+        return values[self.name]
@@ -1,12 +1,179 @@
-from pycbc.psd import interpolate
-from pycbc.catalog import Merger
-from pycbc.waveform import get_td_waveform
-import matplotlib.pyplot as plt
-from pycbc.filter import highpass, matched_filter
+from .cache import WaveformCache, strain_cache
+from .psd import PSDProvider
+from . import plotting
+from . import triggers as tr
+from .profiling import count, timed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
 import os
 
 version = "1.0"
 
+# pycbc et matplotlib sont importés dans les fonctions qui les utilisent : l'import du module
+# reste rapide, ce qui compte pour les processus de travail de courte durée.
+
+APPROXIMANT = 'SEOBNRv4_opt'
+
+# Cache en memoire des modeles, partage par toutes les instances de GWData d'un processus.
+WAVEFORM_CACHE = WaveformCache()
+
+# Fournisseur de PSD partage par les instances de GWData sans cache de donnees (memoire seulement).
+PSD_PROVIDER = PSDProvider()
+
+# Fournisseurs de PSD partages par les instances de GWData avec cache : un par dossier du cache.
+_PSD_PROVIDERS = {}
+
+BANK_DTYPE = np.dtype([("m1", np.float64), ("m2", np.float64), ("snr", np.float64), ("time", np.float64)])
+
+# Etat des processus de la recherche sur grille (donnees en memoire partagee).
+_WORKER = {}
+
+
+def Merger(name):
+    """
+    Événement du catalogue pycbc (`pycbc.catalog.Merger`), importé au premier appel. `GWData`
+    passe par cette fonction : la remplacer suffit pour fournir d'autres données.
+    """
+    from pycbc.catalog import Merger
+
+    return Merger(name)
+
+
+def _default_psd_provider(cache):
+    """
+    Fournisseur de PSD par défaut : les PSD suivent le choix de cache des données, sur disque
+    dans le dossier du `StrainCache`, ou seulement en mémoire (`PSD_PROVIDER`) sans cache.
+    """
+    if cache is None:
+        return PSD_PROVIDER
+    if cache.directory not in _PSD_PROVIDERS:
+        _PSD_PROVIDERS[cache.directory] = PSDProvider(directory=cache.directory)
+    return _PSD_PROVIDERS[cache.directory]
+
+
+def _template(m1, m2, f_min, delta_t, duration, length):
+    """
+    Génère la polarisation "+" de la forme d'onde (m1, m2), redimensionnée à `length` échantillons.
+    """
+    from pycbc.waveform import get_td_waveform
+
+    hp, _ = get_td_waveform(
+        approximant=APPROXIMANT,
+        mass1=m1, 
+        mass2=m2, 
+        f_lower=f_min,
+        delta_t=delta_t, 
+        duration=duration
+    )
+    hp.resize(length)
+    return hp
+
+
+def _frequency_template(cache, m1, m2, f_min, delta_t, duration, length):
+    """
+    Modèle (m1, m2) dans le domaine fréquentiel, lu dans `cache` ou généré puis mis en cache.
+    `delta_t` est arrondi à 12 chiffres significatifs : un pas calculé (`time[1] - time[0]`) et
+    `strain.delta_t` donnent la même clé malgré un écart sur le dernier bit.
+    """
+    delta_t = float(f"{float(delta_t):.12g}")
+    params = {
+        "approximant": APPROXIMANT,
+        "m1": float(m1),
+        "m2": float(m2),
+        "f_min": float(f_min),
+        "delta_t": float(delta_t),
+        "duration": float(duration),
+        "length": int(length),
+    }
+    return cache.get(params, lambda: _template(m1, m2, f_min, delta_t, duration, length).to_frequencyseries())
+
+
+def _filter(template, strain, psd, f_min, sigmasq=None):
+    """
+    Filtre adapté du modèle sur les données, sans les 8 s corrompues à chaque bord.
+    `sigmasq` permet de réutiliser une normalisation déjà connue du modèle.
+    """
+    from pycbc.filter import matched_filter
+
+    count("ligo.templates")
+    count("ligo.samples", len(strain))
+
+    snr = matched_filter(
+        template, 
+        strain, 
+        psd=psd, 
+        low_frequency_cutoff=f_min,
+        sigmasq=sigmasq
+    )
+    return snr.crop(8, 8)
+
+
+def _peak(snr):
+    """
+    Maximum de |SNR| et temps GPS associé.
+    """
+    snr_abs = abs(snr).numpy()
+    i = np.argmax(snr_abs)
+    return float(snr_abs[i]), float(snr.sample_times[i])
+
+
+def _share(array):
+    """
+    Copie un tableau dans un bloc de mémoire partagée.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+
+def _release(shm):
+    """
+    Ferme et détruit un bloc créé par `_share`. Les processus de travail partagent le
+    `resource_tracker` du parent et en ont retiré le bloc avec `_attach` : il y est réinscrit
+    avant `unlink`, qui l'en retire à nouveau.
+    """
+    shm.close()
+    resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def _attach(name, shape, dtype):
+    """
+    Rattache un bloc de mémoire partagée et retourne le bloc et la vue numpy associée.
+    Appelée uniquement dans les processus de travail : le bloc appartient au processus parent,
+    qui seul le libère, et n'est donc pas inscrit auprès du `resource_tracker` du processus.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_grid_worker(spec):
+    """
+    Initialise un processus de la recherche sur grille : les données conditionnées et la PSD
+    sont lues directement dans la mémoire partagée, sans copie.
+    """
+    from pycbc.types import TimeSeries, FrequencySeries
+
+    strain_shm, strain = _attach(*spec["strain"])
+    psd_shm, psd = _attach(*spec["psd"])
+    _WORKER["shm"] = (strain_shm, psd_shm)
+    _WORKER["strain"] = TimeSeries(strain, delta_t=spec["delta_t"], epoch=spec["epoch"], copy=False)
+    _WORKER["psd"] = FrequencySeries(psd, delta_f=spec["delta_f"], copy=False)
+    _WORKER["f_min"] = spec["f_min"]
+    _WORKER["duration"] = spec["duration"]
+
+
+def _grid_worker(masses):
+    """
+    Calcule le maximum de |SNR| pour un couple de masses, dans un processus de la grille.
+    """
+    strain = _WORKER["strain"]
+    htilde = _frequency_template(WAVEFORM_CACHE, masses[0], masses[1], _WORKER["f_min"], strain.delta_t, _WORKER["duration"], len(strain))
+    return _peak(_filter(htilde, strain, _WORKER["psd"], _WORKER["f_min"]))
+
+
 class GWData:
     """
     Classe pour analyser les données d'événements d'ondes gravitationnelles.
@@ -19,7 +186,15 @@ class GWData:
     Attributs :
     -----------
         event : Merger 
-        	Objet représentant l'événement d'onde gravitationnelle.
+        	Objet représentant l'événement d'onde gravitationnelle (créé seulement si les
+        	données ne sont pas en cache).
+        event_name : str
+        	Nom de l'événement (ex. "GW150914").
+        cache : StrainCache ou None
+        	Cache local des données, None si désactivé (argument `cache` : StrainCache, bool ou
+        	None, voir `cache.strain_cache`).
+        strain_duration : float
+        	Durée (en secondes) des données demandées au catalogue, 32 s par défaut.
         detector: str
         	Nom du détecteur (ex. "H1" pour Hanford).
         strain : TimeSeries
@@ -46,13 +221,23 @@ class GWData:
         	Durée de la simulation de la forme d'onde (en secondes).
         hp : TimeSeries
         	Polarisation "+" de la forme d'onde gravitationnelle.
+        htilde : FrequencySeries
+        	Polarisation "+" dans le domaine fréquentiel, utilisée pour le filtrage.
+        waveform_cache : WaveformCache
+        	Cache des modèles (par défaut, le cache en mémoire `WAVEFORM_CACHE` du module).
+        psd_provider : PSDProvider
+        	Estimation de la PSD et filtre passe-haut (par défaut, voir `_default_psd_provider`).
         snr : TimeSeries 
         	Rapport signal-bruit (SNR) calculé.
     """
 
-    def __init__(self, event, detector, m1, m2, f_min, duration, dt):
+    def __init__(self, event, detector, m1, m2, f_min, duration, dt, cache=None, waveform_cache=None, psd_provider=None,
+                 strain_duration=32.0):
         
-        self.event = Merger(event)
+        self.event = None
+        self.event_name = event
+        self.cache = strain_cache(cache)
+        self.strain_duration = strain_duration
         self.detector = detector
         self.strain = None
         self.filtered_strain = None
@@ -67,9 +252,13 @@ class GWData:
         self.duration = duration
         self.dt = dt
         self.hp = None
+        self.htilde = None
+        self.waveform_cache = WAVEFORM_CACHE if waveform_cache is None else waveform_cache
+        self.psd_provider = _default_psd_provider(self.cache) if psd_provider is None else psd_provider
         self.snr = None
         
-    def Main(self): 
+    @timed
+    def Main(self, show=True): 
         """
         Paramètres de bases :
         ---------------------
@@ -87,15 +276,34 @@ class GWData:
             Durée pour la forme d'onde (en secondes).
         dt : float
             Intervalle de temps entre les échantillons (en secondes).
+        cache : StrainCache, bool ou None, optionnel
+            Cache local des données ; None ou True pour `StrainCache()` (défaut), False pour le désactiver.
+        waveform_cache : WaveformCache, optionnel
+            Cache des modèles ; par défaut le cache en mémoire partagé du module.
+        psd_provider : PSDProvider, optionnel
+            Estimation de la PSD ; par défaut un fournisseur partagé, qui enregistre les PSD dans le
+            dossier du cache des données, ou seulement en mémoire si `cache=False`.
+        strain_duration : float, optionnel
+            Durée (en secondes) des données demandées au catalogue, par défaut 32 s.
+
+        Paramètres :
+        ------------
+        show : bool, optionnel
+            Affiche la fenêtre interactive (par défaut True) ; sinon la figure est seulement enregistrée.
         """
     	
-        # Création et chargement des données		
-        self.load_data()
+        # Création et chargement des données (une seule fois par objet)
+        if self.strain is None:
+            self.load_data()
         self.generate_waveform()
         self.filter_data()
-        self.plot_data()
-        plt.show()
+        self.plot_data(show=show)
+        if show:
+            import matplotlib.pyplot as plt
+
+            plt.show()
 
+    @timed
     def load_data(self):
         """
         Charge les données de l'événement et calcule la PSD interpolée.
@@ -103,8 +311,10 @@ class GWData:
         Description :
         -------------
         Cette méthode charge les données de l'événement d'onde gravitationnelle et effectue
-        un filtrage passe-haut pour éliminer les basses fréquences non pertinentes. Elle calcule
-        également la densité spectrale de puissance (PSD) et l'interpole pour le filtrage.
+        un filtrage passe-haut pour éliminer les basses fréquences non pertinentes. La densité
+        spectrale de puissance (PSD) et sa version interpolée pour le filtrage sont fournies par
+        `psd_provider`, qui ne les recalcule pas si elles sont en cache. Les données sont lues
+        dans le cache local si elles y sont, sinon téléchargées puis enregistrées.
 
         Paramètres :
         ------------
@@ -114,15 +324,36 @@ class GWData:
         ----------
         Aucun.
         """
-        self.strain = self.event.strain(self.detector)
-        self.filtered_strain = highpass(self.strain, 15.0)
+        self.strain = self._load_strain()
+        self.filtered_strain = self.psd_provider.condition(self.strain)
         self.time = self.strain.sample_times
         self.dt = self.time[1] - self.time[0]
         len_t = len(self.time)
         self.time_tot = self.dt * len_t
-        self.psd = self.filtered_strain.psd(4)
-        self.psd_interpolated = interpolate(self.psd, self.filtered_strain.delta_f)
+        self.psd = self.psd_provider.get(self.event_name, self.detector, self.filtered_strain)
+        self.psd_interpolated = self.psd_provider.get(self.event_name, self.detector, self.filtered_strain,
+                                                      self.filtered_strain.delta_f)
 
+    def _merger(self):
+        """
+        Retourne l'objet `Merger` de l'événement, créé au premier appel.
+        """
+        if self.event is None:
+            self.event = Merger(self.event_name)
+        return self.event
+
+    def _load_strain(self):
+        """
+        Retourne la série de contraintes brute, depuis le cache si possible. La fréquence
+        d'échantillonnage (`1 / dt`) et la durée demandées font partie de la clé du cache.
+        """
+        sample_rate = int(round(1 / self.dt))
+        download = lambda: self._merger().strain(self.detector, duration=self.strain_duration, sample_rate=sample_rate)
+        if self.cache is None:
+            return download()
+        return self.cache.fetch(self.event_name, self.detector, download, sample_rate, self.strain_duration)
+
+    @timed
     def generate_waveform(self):
         """
         Génère la forme d'onde gravitationnelle pour les masses spécifiées.
@@ -131,7 +362,9 @@ class GWData:
         -------------
         Cette méthode génère la forme d'onde gravitationnelle pour les objets compacts
         spécifiés par leurs masses et la fréquence minimale. La polarisation "+" est
-        calculée à l'aide de l'approximant 'SEOBNRv4_opt'.
+        calculée à l'aide de l'approximant 'SEOBNRv4_opt'. Le modèle, redimensionné à la longueur
+        des données, est conservé dans le domaine fréquentiel (`htilde`) et mis en cache : un même
+        jeu de paramètres n'est généré qu'une seule fois.
 
         Paramètres :
         ------------
@@ -141,16 +374,11 @@ class GWData:
         ----------
         Aucun.
         """
-        self.hp, _ = get_td_waveform(
-            approximant='SEOBNRv4_opt',
-            mass1=self.m1, 
-            mass2=self.m2, 
-            f_lower=self.f_min,
-            delta_t=self.dt, 
-            duration=self.duration
-        )
-        self.hp.resize(len(self.strain))
+        self.htilde = _frequency_template(self.waveform_cache, self.m1, self.m2, self.f_min, self.strain.delta_t, self.duration,
+                                          len(self.strain))
+        self.hp = self.htilde.to_timeseries()
 
+    @timed
     def filter_data(self):
         """
         Applique le filtre de corrélation croisée pour calculer le SNR.
@@ -169,15 +397,47 @@ class GWData:
         ----------
         Aucun.
         """
-        self.snr = matched_filter(
-            self.hp, 
-            self.filtered_strain, 
-            psd=self.psd_interpolated, 
-            low_frequency_cutoff=self.f_min
-        )
-        self.snr = self.snr.crop(8, 8)
+        self.snr = _filter(self.htilde, self.filtered_strain, self.psd_interpolated, self.f_min)
+
+    def peak(self):
+        """
+        Retourne le maximum du SNR en valeur absolue et l'instant correspondant.
 
-    def plot_data(self):
+        Paramètres :
+        ------------
+        Aucun.
+
+        Retourne :
+        ----------
+        tuple
+            `(snr_max, time_max)` : valeur maximale de |SNR| et temps GPS associé (en secondes).
+        """
+        
+        return _peak(self.snr)
+
+    def triggers(self, threshold=5.0, window=1.0, template_id=0):
+        """
+        Extrait les déclenchements du SNR : seuil, puis le plus fort par fenêtre de temps.
+
+        Paramètres :
+        ------------
+        threshold : float, optionnel (défaut = 5.0)
+            Seuil sur |SNR|.
+        window : float, optionnel (défaut = 1.0)
+            Durée de la fenêtre de regroupement (en secondes).
+        template_id : int, optionnel (défaut = 0)
+            Numéro du modèle, recopié dans chaque déclenchement.
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            Tableau structuré (time, snr, phase, template_id), voir `triggers.cluster`.
+        """
+        
+        return tr.from_series(self.snr, threshold, window, template_id)
+
+    @timed
+    def plot_data(self, output_dir="./results_ligo/", budget=plotting.DEFAULT_BUDGET, show=False):
         """
         Génère un ensemble de graphiques pour analyser les données et leurs propriétés.
 
@@ -194,28 +454,45 @@ class GWData:
         
         - L'amplitude de la polarisation "+" de la forme d'onde gravitationnelle.
         
-        - Le rapport signal-bruit (SNR) en fonction du temps.
+        - Le module du rapport signal-bruit |SNR| en fonction du temps.
 
         Paramètres :
         ------------
-        Aucun.
+        output_dir : str, optionnel
+            Dossier où la figure est enregistrée (par défaut "./results_ligo/").
+        budget : int, optionnel
+            Nombre maximal de points tracés par courbe ; les séries longues sont réduites par
+            `plotting.decimate`, qui conserve leurs extrema.
+        show : bool, optionnel
+            Crée la figure avec pyplot pour l'afficher ensuite (`plt.show()`). Par défaut, la figure
+            est construite directement (`Figure` et `FigureCanvasAgg`), sans l'état global de pyplot :
+            le tracé peut alors être fait dans un autre fil que le fil principal.
 
         Retourne :
         ----------
-        Aucun. Les graphiques sont affichés.
+        Figure
+            La figure, enregistrée au format PNG dans `output_dir`.
         """
-        
-        output_dir = "./results_ligo/"
+
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
         # Créer un gridspec pour personnaliser l'agencement des subplots
-        fig = plt.figure(figsize=(16, 9))
+        if show:
+            import matplotlib.pyplot as plt
+
+            fig = plt.figure(figsize=(16, 9))
+        else:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            fig = Figure(figsize=(16, 9))
+            FigureCanvasAgg(fig)
         gs = fig.add_gridspec(3, 2)  # Crée une grille de 3x2
 
         # Subplots 1 et 2
         ax1 = fig.add_subplot(gs[0, 0])
-        ax1.plot(self.time, self.strain, label="Hanford (H1)")
+        plotting.plot(ax1, self.time, self.strain, budget, label="Hanford (H1)")
         ax1.set_xlabel("Temps (secondes)")
         ax1.set_ylabel("Amplitude de la contrainte (strain)")
         ax1.set_title("Série temporelle de l'événement GW150914 - Hanford (H1)")
@@ -223,7 +500,7 @@ class GWData:
         ax1.grid()
 
         ax2 = fig.add_subplot(gs[0, 1])
-        ax2.plot(self.time, self.filtered_strain, label="Hanford (H1) - Filtré")
+        plotting.plot(ax2, self.time, self.filtered_strain, budget, label="Hanford (H1) - Filtré")
         ax2.set_xlabel("Temps (secondes)")
         ax2.set_ylabel("Amplitude de la contrainte (strain)")
         ax2.set_title("Série temporelle filtrée de l'événement GW150914 - Hanford (H1)")
@@ -232,8 +509,10 @@ class GWData:
 
         # Subplot 3 et 4
         ax3 = fig.add_subplot(gs[1, 0])
-        ax3.loglog(self.psd_interpolated.sample_frequencies, self.psd_interpolated, label="PSD du bruit (interpolée)")
-        ax3.set_xlim(3, 3000)
+        plotting.plot(ax3, self.psd_interpolated.sample_frequencies, self.psd_interpolated, budget, xlim=(3, 3000),
+                      label="PSD du bruit (interpolée)")
+        ax3.set_xscale("log")
+        ax3.set_yscale("log")
         ax3.set_xlabel("Fréquence (Hz)")
         ax3.set_ylabel('PSD (strain' + r'$^2$' + '.Hz' + r'$^{-1}$)')
         ax3.set_title("Densité spectrale de puissance du bruit interpolée - GW150914")
@@ -241,8 +520,7 @@ class GWData:
         ax3.grid()
 
         ax4 = fig.add_subplot(gs[1, 1])
-        ax4.plot(self.hp.sample_times, self.hp, label="Polarisation +")
-        ax4.set_xlim(-0.33, 0.05)
+        plotting.plot(ax4, self.hp.sample_times, self.hp, budget, xlim=(-0.33, 0.05), label="Polarisation +")
         ax4.set_xlabel("Temps (s)")
         ax4.set_ylabel("Amplitude")
         ax4.set_title("Amplitude de la polarisation '+' de l'onde gravitationnelle")
@@ -251,7 +529,7 @@ class GWData:
 
         # Fusionner axes[2, 0] et axes[2, 1] pour que le dernier graphique prenne deux places
         ax5 = fig.add_subplot(gs[2, :])  # Fusionne les deux colonnes sur la dernière ligne
-        ax5.plot(self.snr.sample_times, self.snr, label="SNR")
+        plotting.plot(ax5, self.snr.sample_times, abs(self.snr), budget, label="|SNR|")
         ax5.set_xlabel("Temps (s)")
         ax5.set_ylabel("Amplitude")
         ax5.set_title("Rapport du bruit sur le signal en fonction du temps")
@@ -265,7 +543,389 @@ class GWData:
         fig.suptitle("Masse des objets : " + str(self.m1) + " M solaire")
 
         # Ajuster l'espacement entre les subplots
-        plt.tight_layout()
+        fig.tight_layout()
         
-        plt.savefig(output_dir + "/GW150914_" + str(self.m1) + "_M.png", format="png")
-        print("Le fichier est sauvé dans le dossier results_ligo/ au nom : GW150914_" + str(self.m1) + "_M.png")
\ No newline at end of file
+        fig.savefig(output_dir + "/GW150914_" + str(self.m1) + "_M.png", format="png")
+        print("Le fichier est sauvé dans le dossier " + output_dir + " au nom : GW150914_" + str(self.m1) + "_M.png")
+        return fig
+
+
+class TemplateBank:
+    """
+    Recherche sur une banque de modèles avec un seul chargement des données.
+
+    Cette classe charge et filtre les données de l'événement et estime la PSD une seule fois,
+    puis applique le filtre adapté pour chaque couple de masses (m1, m2). Seule la forme d'onde
+    change d'un modèle à l'autre.
+
+    Attributs :
+    -----------
+        data : GWData
+        	Objet portant les données conditionnées et la PSD interpolée, réutilisé pour tous les modèles.
+        results : numpy.ndarray
+        	Tableau structuré (m1, m2, snr, time) de la dernière recherche.
+    """
+
+    def __init__(self, event, detector, f_min=20.0, duration=32.0, dt=1 / 4096.0, cache=None, waveform_cache=None,
+                 psd_provider=None):
+
+        self.data = GWData(event=event, detector=detector, m1=None, m2=None, f_min=f_min, duration=duration, dt=dt,
+                           cache=cache, waveform_cache=waveform_cache, psd_provider=psd_provider)
+        self.results = None
+
+    def load_data(self):
+        """
+        Charge les données et estime la PSD, si ce n'est pas déjà fait.
+
+        Paramètres :
+        ------------
+        Aucun.
+
+        Retourne :
+        ----------
+        Aucun.
+        """
+        if self.data.strain is None:
+            self.data.load_data()
+
+    def filter_template(self, m1, m2):
+        """
+        Génère le modèle (m1, m2) et calcule le SNR sur les données déjà chargées.
+
+        Paramètres :
+        ------------
+        m1 : float
+            Masse du premier objet compact (en masses solaires).
+        m2 : float
+            Masse du second objet compact (en masses solaires).
+
+        Retourne :
+        ----------
+        GWData
+            L'objet `data`, dont les attributs `hp` et `snr` correspondent au modèle demandé.
+        """
+        self.load_data()
+        self.data.m1 = m1
+        self.data.m2 = m2
+        self.data.generate_waveform()
+        self.data.filter_data()
+        return self.data
+
+    def search(self, masses):
+        """
+        Applique le filtre adapté pour chaque couple de masses.
+
+        Paramètres :
+        ------------
+        masses : iterable
+            Couples (m1, m2) en masses solaires.
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            Tableau structuré (m1, m2, snr, time) : maximum de |SNR| et temps GPS associé pour
+            chaque modèle. Il est aussi stocké dans l'attribut `results`.
+        """
+        rows = []
+        for m1, m2 in masses:
+            self.filter_template(m1, m2)
+            rows.append((m1, m2) + self.data.peak())
+        self.results = np.array(rows, dtype=BANK_DTYPE)
+        return self.results
+
+    def search_triggers(self, masses, threshold=5.0, window=1.0):
+        """
+        Applique le filtre adapté pour chaque couple de masses et ne garde que les déclenchements.
+
+        Description :
+        -------------
+        La série de SNR de chaque modèle est réduite à ses déclenchements regroupés dès qu'elle est
+        calculée, puis libérée : la mémoire ne dépend plus du nombre de modèles et plusieurs signaux
+        peuvent être trouvés dans les mêmes données.
+
+        Paramètres :
+        ------------
+        masses : iterable
+            Couples (m1, m2) en masses solaires.
+        threshold : float, optionnel (défaut = 5.0)
+            Seuil sur |SNR|.
+        window : float, optionnel (défaut = 1.0)
+            Durée de la fenêtre de regroupement (en secondes).
+
+        Retourne :
+        ----------
+        tuple
+            `(templates, triggers)` : tableau structuré (m1, m2) des modèles, et déclenchements
+            (time, snr, phase, template_id) où `template_id` est l'indice du modèle dans `templates`.
+        """
+        masses = [(float(m1), float(m2)) for m1, m2 in masses]
+        found = []
+        for k, (m1, m2) in enumerate(masses):
+            self.filter_template(m1, m2)
+            found.append(self.data.triggers(threshold, window, k))
+            self.data.snr = None
+        templates = np.array(masses, dtype=[("m1", np.float64), ("m2", np.float64)])
+        return templates, tr.concatenate(found)
+
+    def build_bank(self, path, masses):
+        """
+        Précalcule une banque de modèles pour ces données et l'enregistre sur disque.
+
+        Paramètres :
+        ------------
+        path : str
+            Chemin de la banque, sans extension.
+        masses : iterable
+            Couples (m1, m2) en masses solaires.
+
+        Retourne :
+        ----------
+        bank.BankFile
+            La banque ouverte en lecture, avec la PSD de ces données comme PSD de référence.
+        """
+        from . import bank
+
+        self.load_data()
+        return bank.build_bank(path, masses, self.data.f_min, self.data.strain.delta_t, self.data.duration,
+                               len(self.data.strain), self.data.psd_interpolated, self.data.waveform_cache)
+
+    def search_bank(self, bank_file):
+        """
+        Applique le filtre adapté avec chaque modèle d'une banque précalculée.
+
+        Description :
+        -------------
+        Les modèles sont lus un par un depuis le fichier projeté en mémoire, sans génération de forme
+        d'onde ni FFT. Si la PSD des données est la PSD de référence de la banque, les normalisations
+        stockées sont aussi réutilisées. La banque doit avoir été construite pour la même longueur,
+        le même pas en fréquence et la même fréquence minimale que les données (ValueError sinon).
+
+        Paramètres :
+        ------------
+        bank_file : bank.BankFile
+            Banque de modèles.
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            Tableau structuré (m1, m2, snr, time), aussi stocké dans l'attribut `results`.
+        """
+        self.load_data()
+        strain = self.data.filtered_strain
+        bank_file.check(len(strain), strain.delta_f, self.data.f_min)
+        psd = self.data.psd_interpolated
+        reuse_sigma = bank_file.matches(psd)
+        rows = []
+        for k, htilde in enumerate(bank_file):
+            p = bank_file.params[k]
+            sigmasq = float(p["sigma"]) ** 2 if reuse_sigma else None
+            snr = _filter(htilde, self.data.filtered_strain, psd, self.data.f_min, sigmasq)
+            rows.append((p["m1"], p["m2"]) + _peak(snr))
+        self.results = np.array(rows, dtype=BANK_DTYPE)
+        return self.results
+
+    def grid_search(self, m1s, m2s, processes=None):
+        """
+        Recherche sur une grille (m1, m2) répartie sur un ensemble de processus.
+
+        Description :
+        -------------
+        Les données conditionnées et la PSD interpolée sont placées une seule fois en mémoire
+        partagée ; chaque processus s'y rattache à son initialisation, puis ne fait que générer
+        des formes d'onde et appliquer le filtre adapté. Les couples (m1, m2) et (m2, m1) donnant
+        la même forme d'onde, chaque paire n'est calculée qu'une fois.
+
+        Paramètres :
+        ------------
+        m1s : array_like
+            Masses du premier objet (en masses solaires), en lignes de la grille.
+        m2s : array_like
+            Masses du second objet (en masses solaires), en colonnes de la grille.
+        processes : int, optionnel (défaut = None)
+            Nombre de processus (par défaut, le nombre de coeurs).
+
+        Retourne :
+        ----------
+        tuple
+            `(snr, time)` : tableaux de forme (len(m1s), len(m2s)) du maximum de |SNR| et du temps
+            GPS associé pour chaque modèle.
+        """
+        self.load_data()
+        m1s = np.asarray(m1s, dtype=float)
+        m2s = np.asarray(m2s, dtype=float)
+        pairs = sorted({(max(a, b), min(a, b)) for a in m1s for b in m2s})
+
+        strain = self.data.filtered_strain
+        psd = self.data.psd_interpolated
+        strain_shm = _share(strain.numpy())
+        psd_shm = _share(psd.numpy())
+        spec = {
+            "strain": (strain_shm.name, len(strain), strain.dtype),
+            "psd": (psd_shm.name, len(psd), psd.dtype),
+            "delta_t": strain.delta_t,
+            "epoch": strain.start_time,
+            "delta_f": psd.delta_f,
+            "f_min": self.data.f_min,
+            "duration": self.data.duration,
+        }
+        processes = processes or os.cpu_count() or 1
+        chunksize = max(1, len(pairs) // (4 * processes))
+        try:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_grid_worker, initargs=(spec,)) as executor:
+                peaks = dict(zip(pairs, executor.map(_grid_worker, pairs, chunksize=chunksize)))
+            # Les compteurs des processus de travail sont perdus : on compte ici.
+            count("ligo.templates", len(pairs))
+            count("ligo.samples", len(pairs) * len(strain))
+        finally:
+            _release(strain_shm)
+            _release(psd_shm)
+
+        snr = np.empty((m1s.size, m2s.size))
+        time = np.empty((m1s.size, m2s.size))
+        for i, a in enumerate(m1s):
+            for j, b in enumerate(m2s):
+                snr[i, j], time[i, j] = peaks[(max(a, b), min(a, b))]
+        return snr, time
+
+
+class NetworkSearch:
+    """
+    Recherche coïncidente sur plusieurs détecteurs (H1, L1, et éventuellement V1).
+
+    Les données de chaque détecteur sont chargées une seule fois, puis chaque modèle est appliqué
+    à tous les détecteurs en parallèle (un fil d'exécution par détecteur). Pour chaque modèle, le
+    détecteur le plus fort sert de référence : dans les autres détecteurs, on cherche le maximum
+    de |SNR| dans une fenêtre égale au temps de trajet de la lumière entre les deux sites (plus une
+    marge). Le SNR du réseau est la somme quadratique des SNR retenus.
+
+    Attributs :
+    -----------
+        detectors : list
+        	Noms des détecteurs.
+        banks : dict
+        	Recherche `TemplateBank` de chaque détecteur.
+        threshold : float
+        	Seuil de SNR qu'un détecteur doit dépasser pour participer à une coïncidence.
+        slop : float
+        	Marge ajoutée au temps de trajet de la lumière (en secondes).
+        results : numpy.ndarray
+        	Tableau structuré de la dernière recherche.
+    """
+
+    def __init__(self, event, detectors=("H1", "L1"), f_min=20.0, duration=32.0, dt=1 / 4096.0,
+                 threshold=5.0, slop=0.002, cache=None, waveform_cache=None, psd_provider=None):
+
+        self.detectors = list(detectors)
+        self.banks = {
+            det: TemplateBank(event, det, f_min=f_min, duration=duration, dt=dt, cache=cache, waveform_cache=waveform_cache,
+                              psd_provider=psd_provider)
+            for det in self.detectors
+        }
+        self.threshold = threshold
+        self.slop = slop
+        self.results = None
+
+    def _map(self, function):
+        """
+        Applique `function` à la recherche de chaque détecteur, en parallèle.
+        """
+        with ThreadPoolExecutor(max_workers=len(self.detectors)) as executor:
+            return dict(zip(self.detectors, executor.map(function, [self.banks[d] for d in self.detectors])))
+
+    def load_data(self):
+        """
+        Charge les données et estime la PSD de chaque détecteur, en parallèle.
+
+        Paramètres :
+        ------------
+        Aucun.
+
+        Retourne :
+        ----------
+        Aucun.
+        """
+        self._map(lambda bank: bank.load_data())
+
+    def window(self, det1, det2):
+        """
+        Fenêtre de coïncidence entre deux détecteurs.
+
+        Paramètres :
+        ------------
+        det1 : str
+            Premier détecteur.
+        det2 : str
+            Second détecteur.
+
+        Retourne :
+        ----------
+        float
+            Temps de trajet de la lumière entre les deux sites plus la marge `slop` (en secondes).
+        """
+        from pycbc.detector import Detector
+
+        return Detector(det1).light_travel_time_to_detector(Detector(det2)) + self.slop
+
+    def _dtype(self):
+        fields = [("m1", np.float64), ("m2", np.float64), ("network_snr", np.float64), ("coincident", np.bool_)]
+        for det in self.detectors:
+            fields += [(f"snr_{det}", np.float64), (f"time_{det}", np.float64)]
+        return np.dtype(fields)
+
+    def coincidence(self, snrs):
+        """
+        Forme le déclenchement coïncident d'un modèle à partir des SNR de chaque détecteur.
+
+        Paramètres :
+        ------------
+        snrs : dict
+            SNR complexe (TimeSeries) de chaque détecteur.
+
+        Retourne :
+        ----------
+        tuple
+            `(network_snr, coincident, peaks)` : SNR du réseau, indicateur de coïncidence (tous
+            les détecteurs au-dessus du seuil) et `(snr, time)` retenu pour chaque détecteur.
+        """
+        peaks = {det: _peak(snr) for det, snr in snrs.items()}
+        ref = max(peaks, key=lambda det: peaks[det][0])
+        t_ref = peaks[ref][1]
+        for det, snr in snrs.items():
+            if det == ref:
+                continue
+            w = self.window(ref, det)
+            peaks[det] = _peak(snr.time_slice(max(t_ref - w, snr.start_time), min(t_ref + w, snr.end_time)))
+        network_snr = float(np.sqrt(sum(p[0] ** 2 for p in peaks.values())))
+        coincident = all(p[0] > self.threshold for p in peaks.values())
+        return network_snr, coincident, peaks
+
+    def search(self, masses):
+        """
+        Applique chaque modèle à tous les détecteurs et forme les coïncidences.
+
+        Paramètres :
+        ------------
+        masses : iterable
+            Couples (m1, m2) en masses solaires.
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            Tableau structuré (m1, m2, network_snr, coincident, snr_<det>, time_<det>...), aussi
+            stocké dans l'attribut `results`.
+        """
+        self.load_data()
+        first = self.banks[self.detectors[0]].data
+        rows = []
+        for m1, m2 in masses:
+            # Forme d'onde générée une seule fois, puis lue dans le cache par chaque détecteur.
+            _frequency_template(first.waveform_cache, m1, m2, first.f_min, first.strain.delta_t, first.duration,
+                                len(first.strain))
+            snrs = self._map(lambda bank: bank.filter_template(m1, m2).snr)
+            network_snr, coincident, peaks = self.coincidence(snrs)
+            row = [m1, m2, network_snr, coincident]
+            for det in self.detectors:
+                row += list(peaks[det])
+            rows.append(tuple(row))
+        self.results = np.array(rows, dtype=self._dtype())
+        return self.results
@@ -0,0 +1,355 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import hashlib
+import json
+import os
+import numpy as np
+
+from . import correlation as co
+from .bruit_blanc import BruitBlanc
+from .bruit_colore import BruitColore
+from . import rng as rg
+from .cache import _write_json, _write_npy
+from .profiling import count, timed
+
+version = "1.0"
+
+# Seuil de détection des méthodes `Detection` (SNR maximal strictement supérieur).
+THRESHOLD = 3.0
+
+# Etat des processus de la campagne (grandeurs préparées par `_prepare`).
+_WORKER = {}
+
+
+def _prepare(sim):
+    """
+    Prépare le calcul vectorisé du SNR d'un simulateur (BruitBlanc ou BruitColore).
+
+    Par linéarité du filtre, le SNR d'un essai d'amplitude A est `(A * tau_signal + tau_bruit) / sigma`,
+    où `tau_signal` est le filtrage du signal unitaire, calculé une seule fois, et `sigma` la
+    normalisation par le bruit de l'essai (1 pour le SNR blanchi du domaine "frequency").
+    Lève TypeError pour tout autre simulateur.
+    """
+    if isinstance(sim, BruitColore):
+        unit = sim.data - sim.bruit
+        noise = sim._bruit_colore_batch
+    elif isinstance(sim, BruitBlanc):
+        unit = sim.signal / sim.a_signal
+        noise = sim._bruit_batch
+    else:
+        raise TypeError(f"Simulateur non pris en charge : {type(sim).__name__}.")
+    if isinstance(sim, BruitColore) and sim.domain == "frequency":
+        model, psd = sim.model, sim.psd
+        correlate = lambda x: co.whitened_snr(model, x, psd)
+        normalize = False
+    else:
+        correlate = sim._template_plan().correlate
+        normalize = True
+    return {"noise": noise, "correlate": correlate, "normalize": normalize, "tau_signal": correlate(unit)}
+
+
+def _digest(array):
+    """
+    Empreinte SHA-256 du contenu d'un tableau.
+    """
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def _statistics(prepared, bruits, amplitudes):
+    """
+    SNR maximal de chaque essai (ligne de `bruits`) pour chaque amplitude, de forme (len(amplitudes), n).
+    Le bruit n'est filtré qu'une fois pour toutes les amplitudes.
+    """
+    tau_bruit = prepared["correlate"](bruits)
+    scale = 1 / np.std(tau_bruit, axis=-1, keepdims=True) if prepared["normalize"] else np.ones((len(bruits), 1))
+    tau_bruit *= scale
+    tau_signal = prepared["tau_signal"] * scale
+    return np.array([np.max(a * tau_signal + tau_bruit, axis=-1) for a in amplitudes])
+
+
+def _run_chunk(prepared, task):
+    """
+    Exécute un bloc d'essais : `task = (kind, index, n, amplitudes, stream)`.
+    """
+    kind, index, n, amplitudes, stream = task
+    bruits = prepared["noise"](n, rng=stream)
+    return kind, index, _statistics(prepared, bruits, amplitudes)
+
+
+def _init_worker(sim):
+    """
+    Initialise un processus de la campagne : le simulateur n'est transmis qu'une fois par processus.
+    """
+    _WORKER["prepared"] = _prepare(sim)
+
+
+def _chunk_worker(task):
+    return _run_chunk(_WORKER["prepared"], task)
+
+
+class MonteCarlo:
+    """
+    Campagne Monte Carlo d'efficacité de détection et de fausses alarmes.
+
+    Description :
+    -------------
+    Pour chaque amplitude de la grille, `n_trials` injections (signal du simulateur mis à
+    l'échelle, plus une réalisation du bruit) sont filtrées, ainsi que `n_trials` essais de bruit
+    seul. Chaque essai est résumé par son SNR maximal, la statistique de `Detection` : un essai
+    est détecté si ce maximum dépasse le seuil. On en déduit l'efficacité de détection en fonction
+    de l'amplitude, le taux de fausses alarmes (proportion d'essais de bruit seul détectés) et les
+    courbes ROC.
+
+    Les essais sont regroupés en blocs de `chunk` réalisations : chaque bloc tire ses bruits
+    en un seul appel (`_bruit_batch` / `_bruit_colore_batch`) et les filtre en une passe par FFT.
+    Le filtrage du bruit d'un bloc d'injections est partagé par toutes les amplitudes. Les blocs
+    sont indépendants : ils sont répartis sur un ensemble de processus, et chaque bloc utilise
+    son propre flux aléatoire (`rng.spawn`), qui ne dépend que de la graine et de l'indice du
+    bloc. Le résultat ne dépend donc pas du nombre de processus.
+
+    Avec un dossier de reprise, chaque bloc terminé est écrit sur disque ; une campagne
+    interrompue reprend là où elle s'était arrêtée et donne le même résultat.
+
+    L'injection est le signal de l'objet simulateur, à sa position : pour un BruitBlanc,
+    l'amplitude est celle du signal (`A_signal`) ; pour un BruitColore, c'est le facteur appliqué
+    au signal simulé (1 pour les données de l'objet). Le filtre (modèle ou `fg`, domaine) est
+    celui du simulateur.
+
+    Attributs :
+    -----------
+        simulator : BruitBlanc ou BruitColore
+        	Simulateur fournissant le signal, le filtre et le générateur de bruit.
+        amplitudes : numpy.ndarray
+        	Grille des amplitudes du signal.
+        n_trials : int
+        	Nombre d'injections par amplitude et nombre d'essais de bruit seul.
+        chunk : int
+        	Nombre d'essais par bloc.
+        seed : None, int ou SeedSequence
+        	Graine de la campagne ; None tire une graine de l'entropie du système (ou reprend
+        	celle du dossier de reprise).
+        processes : int
+        	Nombre de processus (1 pour un calcul dans le processus courant).
+        directory : str ou None
+        	Dossier de reprise, None pour ne rien écrire sur disque.
+        threshold : float
+        	Seuil de détection sur le SNR maximal.
+        injections : numpy.ndarray
+        	SNR maximal des injections, de forme (len(amplitudes), n_trials), après `run`.
+        noise : numpy.ndarray
+        	SNR maximal des essais de bruit seul, de forme (n_trials,), après `run`.
+    """
+
+    def __init__(self, simulator, amplitudes, n_trials=10000, chunk=1000, seed=None, processes=None,
+                 directory=None, threshold=THRESHOLD):
+
+        if chunk < 1:
+            raise ValueError("Les blocs doivent contenir au moins un essai.")
+        self.simulator = simulator
+        self.amplitudes = np.atleast_1d(np.asarray(amplitudes, dtype=float))
+        self.n_trials = int(n_trials)
+        self.chunk = int(chunk)
+        self.seed = seed
+        self.processes = processes or os.cpu_count() or 1
+        self.directory = directory
+        self.threshold = threshold
+        self.injections = None
+        self.noise = None
+
+    def _params(self, prepared, seed):
+        """
+        Paramètres qui identifient la campagne ; une reprise n'est possible qu'à paramètres égaux.
+        Le modèle de bruit (amplitude, PSD ou covariance) et le filtre sont identifiés par une
+        réalisation de référence, tirée d'un flux fixe, et par son filtrage.
+        """
+        reference = prepared["noise"](1, rng=np.random.SeedSequence(0))
+        return {
+            "simulator": type(self.simulator).__name__,
+            "signal": _digest(prepared["tau_signal"]),
+            "noise": _digest(reference),
+            "filter": _digest(prepared["correlate"](reference)),
+            "amplitudes": self.amplitudes.tolist(),
+            "n_trials": self.n_trials,
+            "chunk": self.chunk,
+            "entropy": str(seed.entropy),
+            "spawn_key": list(seed.spawn_key),
+        }
+
+    def _path(self, kind, index):
+        return os.path.join(self.directory, f"{kind}_{index:06d}.npy")
+
+    def _seed_sequence(self):
+        """
+        Graine de la campagne : `seed`, sinon celle enregistrée dans le dossier de reprise, sinon
+        une nouvelle entropie du système.
+        """
+        if isinstance(self.seed, np.random.SeedSequence):
+            return self.seed
+        if self.seed is None and self.directory is not None and os.path.exists(os.path.join(self.directory, "campaign.json")):
+            with open(os.path.join(self.directory, "campaign.json")) as f:
+                meta = json.load(f)
+            return np.random.SeedSequence(int(meta["entropy"]), spawn_key=meta["spawn_key"])
+        return np.random.SeedSequence(self.seed)
+
+    def _tasks(self, seed):
+        """
+        Blocs d'essais : injections puis bruit seul, chaque type ayant sa propre suite de flux.
+        """
+        injection_seed, noise_seed = rg.spawn(seed, 2)
+        tasks = []
+        for kind, seed, amplitudes in (("injection", injection_seed, self.amplitudes), ("noise", noise_seed, [0.0])):
+            for index, start in enumerate(range(0, self.n_trials, self.chunk)):
+                n = min(self.chunk, self.n_trials - start)
+                tasks.append((kind, index, n, amplitudes, rg.spawn(seed, 1, start=index)[0]))
+        return tasks
+
+    @timed
+    def run(self):
+        """
+        Exécute (ou reprend) la campagne.
+
+        Retourne :
+        ----------
+        MonteCarlo
+            L'objet lui-même, avec les attributs `injections` et `noise` remplis.
+        """
+        prepared = _prepare(self.simulator)
+        seed = self._seed_sequence()
+        params = self._params(prepared, seed)
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            meta_path = os.path.join(self.directory, "campaign.json")
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    if json.load(f) != params:
+                        raise ValueError(f"Le dossier {self.directory} contient une autre campagne.")
+            else:
+                _write_json(meta_path, params)
+
+        self.injections = np.empty((self.amplitudes.size, self.n_trials))
+        self.noise = np.empty(self.n_trials)
+        pending = []
+        for task in self._tasks(seed):
+            kind, index = task[:2]
+            if self.directory is not None and os.path.exists(self._path(kind, index)):
+                self._store(kind, index, np.load(self._path(kind, index)))
+            else:
+                pending.append(task)
+
+        if self.processes == 1 or len(pending) <= 1:
+            for task in pending:
+                self._collect(*_run_chunk(prepared, task))
+        else:
+            self._run_pool(pending)
+        return self
+
+    def _run_pool(self, tasks):
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self.simulator,)) as executor:
+            running = set()
+            # Au plus deux blocs en cours par processus.
+            for task in tasks:
+                running.add(executor.submit(_chunk_worker, task))
+                if len(running) >= 2 * self.processes:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(*future.result())
+            for future in running:
+                self._collect(*future.result())
+
+    def _collect(self, kind, index, stats):
+        count("montecarlo." + kind, stats.size)
+        if self.directory is not None:
+            _write_npy(self._path(kind, index), stats)
+        self._store(kind, index, stats)
+
+    def _store(self, kind, index, stats):
+        start = index * self.chunk
+        if kind == "injection":
+            self.injections[:, start:start + stats.shape[-1]] = stats
+        else:
+            self.noise[start:start + stats.shape[-1]] = stats[0]
+
+    def efficiency(self, threshold=None):
+        """
+        Efficacité de détection pour chaque amplitude.
+
+        Paramètres :
+        ------------
+        threshold : float, optionnel (défaut = None)
+            Seuil de détection ; par défaut celui de la campagne.
+
+        Retourne :
+        ----------
+        tuple
+            `(efficiency, error)` : proportion d'injections détectées pour chaque amplitude et son
+            erreur binomiale (écart-type).
+        """
+        threshold = self.threshold if threshold is None else threshold
+        p = np.mean(self.injections > threshold, axis=-1)
+        return p, np.sqrt(p * (1 - p) / self.n_trials)
+
+    def false_alarm_rate(self, threshold=None):
+        """
+        Taux de fausses alarmes : proportion d'essais de bruit seul détectés.
+
+        Paramètres :
+        ------------
+        threshold : float, optionnel (défaut = None)
+            Seuil de détection ; par défaut celui de la campagne.
+
+        Retourne :
+        ----------
+        tuple
+            `(rate, error)` : taux de fausses alarmes par réalisation et son erreur binomiale.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        p = float(np.mean(self.noise > threshold))
+        return p, float(np.sqrt(p * (1 - p) / self.n_trials))
+
+    def roc(self, thresholds=None):
+        """
+        Courbes ROC (efficacité en fonction du taux de fausses alarmes) pour chaque amplitude.
+
+        Paramètres :
+        ------------
+        thresholds : numpy.ndarray, optionnel (défaut = None)
+            Seuils à évaluer ; par défaut 200 seuils couvrant tous les SNR maximaux observés.
+
+        Retourne :
+        ----------
+        tuple
+            `(false_alarm, efficiency, thresholds)` : taux de fausses alarmes pour chaque seuil,
+            tableau (len(amplitudes), len(thresholds)) des efficacités et seuils utilisés.
+        """
+        if thresholds is None:
+            lo = min(self.noise.min(), self.injections.min())
+            hi = max(self.noise.max(), self.injections.max())
+            thresholds = np.linspace(lo, hi, 200)
+        thresholds = np.asarray(thresholds, dtype=float)
+        noise = np.sort(self.noise)
+        false_alarm = 1 - np.searchsorted(noise, thresholds, side="right") / noise.size
+        efficiency = np.array([1 - np.searchsorted(np.sort(row), thresholds, side="right") / row.size
+                               for row in self.injections])
+        return false_alarm, efficiency, thresholds
+
+    def summary(self):
+        """
+        Résumé sérialisable en JSON de la campagne au seuil de détection.
+
+        Retourne :
+        ----------
+        dict
+            Amplitudes, efficacités et erreurs, taux de fausses alarmes et son erreur, seuil et
+            nombre d'essais.
+        """
+        efficiency, error = self.efficiency()
+        rate, rate_error = self.false_alarm_rate()
+        return {
+            "threshold": self.threshold,
+            "n_trials": self.n_trials,
+            "amplitudes": self.amplitudes.tolist(),
+            "efficiency": efficiency.tolist(),
+            "efficiency_error": error.tolist(),
+            "false_alarm_rate": rate,
+            "false_alarm_rate_error": rate_error,
+        }
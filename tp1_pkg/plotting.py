@@ -0,0 +1,85 @@
+import numpy as np
+
+version = "1.0"
+
+# Nombre de points tracés par défaut pour une courbe (environ deux par pixel d'une figure de 16 pouces).
+DEFAULT_BUDGET = 4000
+
+
+def decimate(x, y, budget=DEFAULT_BUDGET, xlim=None):
+    """
+    Réduit une série au nombre de points à tracer en conservant son enveloppe.
+
+    Description :
+    -------------
+    La série est découpée en `budget // 2` intervalles consécutifs ; pour chacun, les
+    échantillons minimum et maximum sont gardés dans leur ordre temporel. Les extrema (par
+    exemple le maximum du SNR) sont donc conservés exactement, et le coût du tracé ne dépend
+    plus de la longueur des données. Une série déjà assez courte est retournée telle quelle.
+
+    Paramètres :
+    ------------
+    x : array_like
+        Abscisses, croissantes.
+    y : array_like
+        Ordonnées réelles.
+    budget : int, optionnel (défaut = DEFAULT_BUDGET)
+        Nombre maximal de points retournés.
+    xlim : tuple, optionnel (défaut = None)
+        Intervalle (x_min, x_max) affiché ; les points en dehors sont écartés avant la réduction.
+
+    Retourne :
+    ----------
+    tuple
+        `(x, y)` : tableaux numpy réduits.
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if xlim is not None:
+        lo, hi = np.searchsorted(x, xlim)
+        x, y = x[max(lo - 1, 0):hi + 1], y[max(lo - 1, 0):hi + 1]
+
+    n = y.size
+    n_buckets = max(budget // 2, 1)
+    if n <= budget:
+        return x, y
+
+    width = -(-n // n_buckets)
+    n_buckets = -(-n // width)
+    padded = np.pad(y, (0, n_buckets * width - n), mode="edge").reshape(n_buckets, width)
+    offset = np.arange(n_buckets) * width
+    i_min = offset + np.argmin(padded, axis=1)
+    i_max = offset + np.argmax(padded, axis=1)
+    idx = np.minimum(np.sort(np.stack((i_min, i_max), axis=1), axis=1).ravel(), n - 1)
+    idx = np.unique(idx)
+    return x[idx], y[idx]
+
+
+def plot(ax, x, y, budget=DEFAULT_BUDGET, xlim=None, **kwargs):
+    """
+    Trace une série sur un axe après réduction par `decimate`.
+
+    Paramètres :
+    ------------
+    ax : Axes
+        Axe matplotlib.
+    x, y : array_like
+        Abscisses et ordonnées de la série.
+    budget : int, optionnel (défaut = DEFAULT_BUDGET)
+        Nombre maximal de points tracés.
+    xlim : tuple, optionnel (défaut = None)
+        Intervalle affiché, appliqué aussi à l'axe.
+    **kwargs
+        Options transmises à `ax.plot` (label, couleur, ...).
+
+    Retourne :
+    ----------
+    list
+        Les lignes créées par `ax.plot`.
+    """
+
+    lines = ax.plot(*decimate(x, y, budget, xlim), **kwargs)
+    if xlim is not None:
+        ax.set_xlim(*xlim)
+    return lines
@@ -0,0 +1,248 @@
+from functools import wraps
+import json
+import os
+import threading
+import time
+
+version = "1.0"
+
+# Mesures actives : variable d'environnement TP1_PROFILE, ou `enable()`.
+_ENABLED = os.environ.get("TP1_PROFILE", "") not in ("", "0")
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+# Chemin des étapes imbriquées -> [nombre d'appels, temps total, temps maximal] (en secondes).
+_STAGES = {}
+_COUNTERS = {}
+
+
+def enable():
+    """
+    Active les mesures.
+
+    Retourne :
+    ----------
+    Aucun.
+    """
+    global _ENABLED
+    _ENABLED = True
+
+
+def disable():
+    """
+    Désactive les mesures ; les fonctions instrumentées ne font plus qu'un test de drapeau.
+
+    Retourne :
+    ----------
+    Aucun.
+    """
+    global _ENABLED
+    _ENABLED = False
+
+
+def is_enabled():
+    """
+    Indique si les mesures sont actives.
+
+    Retourne :
+    ----------
+    bool
+        True si les mesures sont actives.
+    """
+    return _ENABLED
+
+
+def reset():
+    """
+    Efface les temps et compteurs enregistrés.
+
+    Retourne :
+    ----------
+    Aucun.
+    """
+    with _LOCK:
+        _STAGES.clear()
+        _COUNTERS.clear()
+
+
+def _stack():
+    stack = getattr(_LOCAL, "stack", None)
+    if stack is None:
+        stack = _LOCAL.stack = []
+    return stack
+
+
+def _record(path, elapsed):
+    with _LOCK:
+        entry = _STAGES.get(path)
+        if entry is None:
+            _STAGES[path] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+
+class Stage:
+    """
+    Contexte mesurant le temps d'une étape, imbriquée dans l'étape en cours du même fil.
+
+    Attributs :
+    -----------
+        name : str
+        	Nom de l'étape.
+    """
+
+    def __init__(self, name):
+
+        self.name = name
+        self._start = None
+
+    def __enter__(self):
+        if _ENABLED:
+            _stack().append(self.name)
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            elapsed = time.perf_counter() - self._start
+            stack = _stack()
+            _record(tuple(stack), elapsed)
+            stack.pop()
+            self._start = None
+        return False
+
+
+def timed(func=None, name=None):
+    """
+    Décorateur mesurant chaque appel d'une fonction comme une étape.
+
+    Description :
+    -------------
+    Quand les mesures sont désactivées, la fonction décorée appelle directement la fonction
+    d'origine après un simple test de drapeau. Quand elles sont actives, le temps de chaque
+    appel est ajouté au registre sous le chemin des étapes en cours (par exemple
+    `GWData.Main;GWData.filter_data`), ce qui donne aussi le détail des étapes imbriquées.
+
+    Paramètres :
+    ------------
+    func : callable
+        Fonction à instrumenter (utilisation sans parenthèses : `@timed`).
+    name : str, optionnel (défaut = None)
+        Nom de l'étape ; par défaut le nom qualifié de la fonction (`Classe.methode`).
+
+    Retourne :
+    ----------
+    callable
+        La fonction instrumentée.
+    """
+    if func is None:
+        return lambda f: timed(f, name)
+    label = name or func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _ENABLED:
+            return func(*args, **kwargs)
+        with Stage(label):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def count(name, n=1):
+    """
+    Incrémente un compteur (par exemple un nombre de modèles ou d'échantillons traités).
+
+    Paramètres :
+    ------------
+    name : str
+        Nom du compteur.
+    n : int, optionnel (défaut = 1)
+        Incrément.
+
+    Retourne :
+    ----------
+    Aucun.
+    """
+    if _ENABLED:
+        with _LOCK:
+            _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+def stats():
+    """
+    Retourne le contenu du registre.
+
+    Retourne :
+    ----------
+    dict
+        `stages` : liste de dictionnaires (`path`, `calls`, `total`, `mean`, `max`, `self`), le
+        temps propre `self` excluant les étapes imbriquées ; `counters` : compteurs.
+    """
+    with _LOCK:
+        stages = {path: list(entry) for path, entry in _STAGES.items()}
+        counters = dict(_COUNTERS)
+    children = {}
+    for path, (_, total, _) in stages.items():
+        if len(path) > 1:
+            children[path[:-1]] = children.get(path[:-1], 0.0) + total
+    rows = [{
+        "path": ";".join(path),
+        "calls": calls,
+        "total": total,
+        "mean": total / calls,
+        "max": peak,
+        "self": total - children.get(path, 0.0),
+    } for path, (calls, total, peak) in sorted(stages.items())]
+    return {"stages": rows, "counters": counters}
+
+
+def dump_json(path):
+    """
+    Écrit le registre au format JSON.
+
+    Paramètres :
+    ------------
+    path : str
+        Chemin du fichier.
+
+    Retourne :
+    ----------
+    Aucun.
+    """
+    with open(path, "w") as f:
+        json.dump(stats(), f, indent=1)
+
+
+def flame():
+    """
+    Résumé au format "folded stacks" des graphes de flammes.
+
+    Description :
+    -------------
+    Une ligne par chemin d'étapes, `etape;sous-etape <temps propre en microsecondes>`, lisible
+    par `flamegraph.pl` ou speedscope.
+
+    Retourne :
+    ----------
+    str
+        Le résumé, une ligne par chemin.
+    """
+    return "\n".join(f"{row['path']} {int(round(row['self'] * 1e6))}" for row in stats()["stages"])
+
+
+def summary():
+    """
+    Tableau lisible des étapes, trié par temps total décroissant.
+
+    Retourne :
+    ----------
+    str
+        Le tableau.
+    """
+    rows = sorted(stats()["stages"], key=lambda row: -row["total"])
+    lines = [f"{'etape':60s} {'appels':>8s} {'total (s)':>12s} {'moyen (ms)':>12s} {'propre (s)':>12s}"]
+    for row in rows:
+        lines.append(f"{row['path']:60s} {row['calls']:8d} {row['total']:12.4f} {row['mean'] * 1e3:12.4f} {row['self']:12.4f}")
+    return "\n".join(lines)
@@ -0,0 +1,197 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import numpy as np
+
+from .cache import default_directory, _write_json, _write_npy
+
+version = "1.0"
+
+
+def _welch(avg_method):
+    def estimate(strain, segment_duration):
+        from pycbc.psd import welch
+
+        seg_len = int(round(segment_duration * strain.sample_rate))
+        return welch(strain, seg_len=seg_len, seg_stride=seg_len // 2, avg_method=avg_method)
+    return estimate
+
+
+# Estimateurs disponibles : fonction (série filtrée, durée des segments en secondes) -> PSD.
+# "median-welch" est l'estimateur par défaut de `TimeSeries.psd`, utilisé jusqu'ici.
+ESTIMATORS = {
+    "welch": _welch("mean"),
+    "median-welch": _welch("median"),
+    "median-mean": _welch("median-mean"),
+}
+
+
+class PSDProvider:
+    """
+    Estimation de la densité spectrale de puissance (PSD) du bruit, avec cache.
+
+    Description :
+    -------------
+    La PSD d'une série est calculée une seule fois par (événement, détecteur, contenu de la
+    série, durée des segments, fréquence de coupure du passe-haut, estimateur), puis gardée en
+    mémoire et, si un dossier est donné, sur disque (fichiers `.npy` et `.json`). L'empreinte
+    des échantillons fait partie de la clé : des données synthétiques ou un segment d'un même
+    événement ne relisent pas la PSD d'une autre série. Les versions
+    interpolées à un pas en fréquence donné sont aussi gardées en mémoire. Le passe-haut
+    appliqué aux données avant l'estimation est celui du fournisseur (`condition`).
+
+    Attributs :
+    -----------
+        directory : str, None ou False
+        	Dossier du cache sur disque ; False (défaut) pour un cache uniquement en mémoire,
+        	None pour le dossier par défaut du package (`cache.default_directory()`).
+        segment_duration : float
+        	Durée des segments de Welch (en secondes).
+        highpass_cutoff : float
+        	Fréquence de coupure du filtre passe-haut (en Hz).
+        estimator : str
+        	Nom de l'estimateur dans `ESTIMATORS` ("welch", "median-welch", "median-mean").
+        maxsize : int
+        	Nombre maximal de PSD gardées en mémoire.
+    """
+
+    def __init__(self, directory=False, segment_duration=4.0, highpass_cutoff=15.0, estimator="median-welch", maxsize=32):
+
+        if estimator not in ESTIMATORS:
+            raise ValueError(f"Estimateur inconnu : {estimator} (choix : {', '.join(ESTIMATORS)}).")
+        self.directory = directory
+        self.segment_duration = segment_duration
+        self.highpass_cutoff = highpass_cutoff
+        self.estimator = estimator
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+
+    def condition(self, strain):
+        """
+        Applique aux données le filtre passe-haut du fournisseur.
+
+        Paramètres :
+        ------------
+        strain : TimeSeries
+            Série de contraintes brute.
+
+        Retourne :
+        ----------
+        TimeSeries
+            La série filtrée.
+        """
+        from pycbc.filter import highpass
+
+        return highpass(strain, self.highpass_cutoff)
+
+    def params(self, event, detector, strain):
+        """
+        Paramètres qui identifient la PSD d'une série.
+
+        Paramètres :
+        ------------
+        event : str
+            Nom de l'événement.
+        detector : str
+            Nom du détecteur.
+        strain : TimeSeries
+            Série filtrée par `condition`.
+
+        Retourne :
+        ----------
+        dict
+            Paramètres (sérialisables en JSON) de la clé de cache.
+        """
+        samples = np.ascontiguousarray(strain.numpy())
+        return {
+            "event": event,
+            "detector": detector,
+            "sample_rate": float(strain.sample_rate),
+            "duration": float(strain.duration),
+            "start_time": float(strain.start_time),
+            "length": len(strain),
+            "samples": hashlib.sha256(samples.tobytes()).hexdigest(),
+            "segment_duration": float(self.segment_duration),
+            "highpass_cutoff": float(self.highpass_cutoff),
+            "estimator": self.estimator,
+        }
+
+    def _path(self, key):
+        directory = default_directory() if self.directory is None else self.directory
+        return os.path.join(directory, "psd", key)
+
+    def _load(self, key):
+        from pycbc.types import FrequencySeries
+
+        path = self._path(key)
+        if not os.path.exists(path + ".json"):
+            return None
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        return FrequencySeries(np.load(path + ".npy"), delta_f=meta["delta_f"])
+
+    def _save(self, key, params, psd):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_npy(path + ".npy", psd.numpy())
+        _write_json(path + ".json", {"params": params, "delta_f": psd.delta_f})
+
+    def _remember(self, key, psd):
+        self._memory[key] = psd
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+        return psd
+
+    def get(self, event, detector, strain, delta_f=None):
+        """
+        Retourne la PSD d'une série, en l'estimant si elle n'est pas en cache.
+
+        Paramètres :
+        ------------
+        event : str
+            Nom de l'événement.
+        detector : str
+            Nom du détecteur.
+        strain : TimeSeries
+            Série filtrée par `condition`.
+        delta_f : float, optionnel (défaut = None)
+            Pas en fréquence demandé ; None retourne la PSD au pas de l'estimateur.
+
+        Retourne :
+        ----------
+        FrequencySeries
+            La PSD, interpolée à `delta_f` si demandé.
+        """
+        params = self.params(event, detector, strain)
+        key = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            psd = self._memory[key]
+        else:
+            psd = self._load(key) if self.directory is not False else None
+            if psd is None:
+                psd = ESTIMATORS[self.estimator](strain, self.segment_duration)
+                if self.directory is not False:
+                    self._save(key, params, psd)
+            self._remember(key, psd)
+        if delta_f is None:
+            return psd
+
+        interpolated_key = (key, float(delta_f))
+        if interpolated_key in self._memory:
+            self._memory.move_to_end(interpolated_key)
+            return self._memory[interpolated_key]
+        from pycbc.psd import interpolate
+
+        return self._remember(interpolated_key, interpolate(psd, delta_f))
+
+    def clear(self):
+        """
+        Vide le cache en mémoire (le cache sur disque est conservé).
+
+        Retourne :
+        ----------
+        Aucun.
+        """
+        self._memory.clear()
@@ -0,0 +1,55 @@
+import numpy as np
+
+version = "1.0"
+
+
+def generator(rng=None):
+    """
+    Retourne un générateur de nombres aléatoires `numpy.random.Generator`.
+
+    Paramètres :
+    ------------
+    rng : None, int, SeedSequence ou Generator, optionnel (défaut = None)
+        None : graine tirée de l'entropie du système ; int ou SeedSequence (par exemple un
+        élément de `spawn`) : générateur déterministe ; Generator : retourné tel quel, le flux
+        est alors partagé avec l'appelant.
+
+    Retourne :
+    ----------
+    numpy.random.Generator
+        Le générateur.
+    """
+    return np.random.default_rng(rng)
+
+
+def spawn(seed, n, start=0):
+    """
+    Crée des flux aléatoires indépendants dérivés d'une même graine.
+
+    Description :
+    -------------
+    Les flux sont les enfants `start`, ..., `start + n - 1` de `SeedSequence(seed)`, identiques
+    à ceux de `SeedSequence(seed).spawn(start + n)[start:]` : ils ne se recouvrent pas et ne
+    dépendent que de la graine et de leur indice. Une campagne peut donc être répartie sur
+    plusieurs processus ou machines (chacun demande sa plage d'indices) et être relancée à
+    l'identique, quel que soit le nombre de processus.
+
+    Paramètres :
+    ------------
+    seed : None, int ou SeedSequence
+        Graine de la campagne ; None tire une graine de l'entropie du système (lisible dans
+        l'attribut `entropy` des flux retournés, pour relancer la campagne).
+    n : int
+        Nombre de flux.
+    start : int, optionnel (défaut = 0)
+        Indice du premier flux.
+
+    Retourne :
+    ----------
+    list
+        Les `n` flux (`SeedSequence`), à passer comme `rng` aux simulateurs ou à `generator`.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (k,), pool_size=seed.pool_size)
+            for k in range(start, start + n)]
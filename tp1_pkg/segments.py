@@ -0,0 +1,281 @@
+from pycbc.filter import matched_filter
+from pycbc.types import TimeSeries
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import os
+
+from . import ligo
+from .cache import strain_cache
+from .psd import PSDProvider
+from .profiling import count, timed
+
+version = "1.0"
+
+# Etat des processus du filtrage par segments (source des donnees et parametres communs).
+_WORKER = {}
+
+
+def segment_bounds(n, seg_len, pad):
+    """
+    Découpe une série de `n` échantillons en segments d'analyse qui se recouvrent.
+
+    Description :
+    -------------
+    Chaque segment compte `seg_len` échantillons ; ses `pad` premiers et derniers échantillons
+    sont corrompus par le filtrage et écartés. Deux segments consécutifs se recouvrent donc de
+    `2 * pad` échantillons, et leurs parties valides se suivent sans trou ni doublon. Le dernier
+    segment est aligné sur la fin des données. Les parties valides couvrent `[pad, n - pad)`,
+    comme le `crop(8, 8)` du filtrage d'un seul bloc.
+
+    Paramètres :
+    ------------
+    n : int
+        Nombre d'échantillons des données.
+    seg_len : int
+        Nombre d'échantillons d'un segment.
+    pad : int
+        Nombre d'échantillons écartés à chaque bord d'un segment.
+
+    Retourne :
+    ----------
+    list
+        Triplets `(start, lo, hi)` : début du segment et intervalle `[lo, hi)` (indices dans
+        les données) de la partie valide à conserver.
+    """
+    if seg_len <= 2 * pad:
+        raise ValueError("Les segments doivent etre plus longs que deux fois la marge.")
+    if n <= seg_len:
+        return [(0, pad, n - pad)]
+    step = seg_len - 2 * pad
+    bounds = []
+    start = 0
+    while start + seg_len < n:
+        bounds.append((start, start + pad, start + seg_len - pad))
+        start += step
+    bounds.append((n - seg_len, bounds[-1][2], n - pad))
+    return bounds
+
+
+def _open_source(source):
+    """
+    Ouvre la source des données brutes : fichier `.npy` projeté en mémoire ou mémoire partagée.
+    """
+    if source[0] == "npy":
+        return None, np.load(source[1], mmap_mode="r")
+    return ligo._attach(*source[1:])
+
+
+def _same_series(meta, strain):
+    """
+    Vérifie qu'une entrée du cache (métadonnées de `StrainCache.find`) contient la série `strain`.
+    Les temps GPS sont proches de 1e9 : le début est comparé en absolu, à un échantillon près.
+    """
+    if abs(meta["start_time"] - float(strain.start_time)) >= strain.delta_t:
+        return False
+    if not np.isclose(1.0 / meta["sample_rate"], strain.delta_t, rtol=1e-9, atol=0):
+        return False
+    return np.load(meta["path"], mmap_mode="r").shape == (len(strain),)
+
+
+def _init_segment_worker(spec):
+    """
+    Initialise un processus du filtrage par segments.
+    """
+    _WORKER["shm"], _WORKER["data"] = _open_source(spec["source"])
+    _WORKER.update({k: v for k, v in spec.items() if k != "source"})
+
+
+def _filter_segment(data, start, stop, spec):
+    """
+    Filtre un segment avec sa propre PSD et retourne le SNR complexe du segment entier.
+    """
+    provider = spec["psd_provider"]
+    raw = TimeSeries(np.array(data[start:stop], dtype=np.float64), delta_t=spec["delta_t"],
+                     epoch=spec["epoch"] + start * spec["delta_t"])
+    strain = provider.condition(raw)
+    psd = provider.get(spec["event"], spec["detector"], strain, strain.delta_f)
+    htilde = ligo._frequency_template(spec["waveform_cache"], spec["m1"], spec["m2"], spec["f_min"],
+                                      spec["delta_t"], spec["duration"], len(strain))
+    snr = matched_filter(htilde, strain, psd=psd, low_frequency_cutoff=spec["f_min"])
+    return snr.numpy()
+
+
+def _segment_worker(bounds):
+    """
+    Filtre un segment dans un processus et retourne la partie valide de son SNR.
+    """
+    start, lo, hi = bounds
+    snr = _filter_segment(_WORKER["data"], start, start + _WORKER["seg_len"], _WORKER)
+    return bounds, snr[lo - start:hi - start]
+
+
+class SegmentedFilter:
+    """
+    Filtre adapté par segments pour les longues séries de données.
+
+    Description :
+    -------------
+    Les données brutes sont découpées en segments d'analyse qui se recouvrent (`segment_bounds`).
+    Chaque segment est filtré indépendamment, dans un ensemble de processus, avec une PSD estimée
+    localement sur le segment, ce qui suit la non-stationnarité du bruit. Les bords corrompus sont
+    écartés et les parties valides sont assemblées en une série de SNR continue. Les processus
+    lisent les données directement dans le fichier du cache (ou en mémoire partagée) et le nombre
+    de segments en cours est borné : la mémoire dépend de la longueur des segments, pas de la
+    durée totale (le SNR assemblé peut lui-même être écrit dans un fichier projeté, voir `run`).
+
+    Attributs :
+    -----------
+        event : str
+        	Nom de l'événement.
+        detector : str
+        	Nom du détecteur.
+        m1, m2 : float
+        	Masses du modèle (en masses solaires).
+        f_min : float
+        	Fréquence minimale (en Hz).
+        duration : float
+        	Durée des formes d'onde (en secondes).
+        segment_duration : float
+        	Durée d'un segment d'analyse (en secondes).
+        pad : float
+        	Durée écartée à chaque bord d'un segment (en secondes), 8 s comme `crop(8, 8)`.
+        cache : StrainCache ou None
+        	Cache local des données, None si désactivé (argument `cache` : StrainCache, bool ou
+        	None, voir `cache.strain_cache`).
+        waveform_cache : WaveformCache
+        	Cache des modèles.
+        psd_provider : PSDProvider
+        	Estimation des PSD locales et filtre passe-haut ; par défaut un fournisseur en mémoire
+        	seulement (`PSDProvider(directory=False)`), pour ne pas écrire une PSD par segment sur
+        	disque. Passer un fournisseur avec un dossier pour les conserver.
+        processes : int
+        	Nombre de processus (1 pour un calcul dans le processus courant).
+        sample_rate : int
+        	Fréquence d'échantillonnage (en Hz) des données demandées au catalogue, 4096 Hz par défaut.
+        strain_duration : float
+        	Durée (en secondes) des données demandées au catalogue, 32 s par défaut.
+    """
+
+    def __init__(self, event, detector, m1, m2, f_min=20.0, duration=32.0, segment_duration=256.0, pad=8.0,
+                 cache=None, waveform_cache=None, psd_provider=None, processes=None, sample_rate=4096,
+                 strain_duration=32.0):
+
+        self.event = event
+        self.detector = detector
+        self.m1 = m1
+        self.m2 = m2
+        self.f_min = f_min
+        self.duration = duration
+        self.segment_duration = segment_duration
+        self.pad = pad
+        self.cache = strain_cache(cache)
+        self.waveform_cache = ligo.WAVEFORM_CACHE if waveform_cache is None else waveform_cache
+        self.psd_provider = PSDProvider(directory=False) if psd_provider is None else psd_provider
+        self.processes = processes or os.cpu_count() or 1
+        self.sample_rate = sample_rate
+        self.strain_duration = strain_duration
+
+    def load_strain(self):
+        """
+        Retourne les données brutes, projetées en mémoire depuis le cache si possible. La fréquence
+        d'échantillonnage et la durée demandées font partie de la clé du cache, comme pour `GWData`.
+
+        Retourne :
+        ----------
+        TimeSeries
+            La série de contraintes brute.
+        """
+        download = lambda: ligo.Merger(self.event).strain(self.detector, duration=self.strain_duration,
+                                                          sample_rate=self.sample_rate)
+        if self.cache is None:
+            return download()
+        return self.cache.fetch(self.event, self.detector, download, self.sample_rate, self.strain_duration)
+
+    def _spec(self, strain):
+        return {
+            "event": self.event,
+            "detector": self.detector,
+            "m1": self.m1,
+            "m2": self.m2,
+            "f_min": self.f_min,
+            "duration": self.duration,
+            "delta_t": strain.delta_t,
+            "epoch": float(strain.start_time),
+            "seg_len": int(round(self.segment_duration / strain.delta_t)),
+            "waveform_cache": self.waveform_cache,
+            "psd_provider": self.psd_provider,
+        }
+
+    @timed
+    def run(self, strain=None, out=None):
+        """
+        Calcule le SNR de toute la série, segment par segment.
+
+        Paramètres :
+        ------------
+        strain : TimeSeries, optionnel (défaut = None)
+            Données brutes ; par défaut elles sont lues avec `load_strain`.
+        out : numpy.ndarray, optionnel (défaut = None)
+            Tableau complexe de `len(strain) - 2 * pad` échantillons où écrire le SNR, par exemple
+            un fichier projeté (`numpy.lib.format.open_memmap`) pour les très longues séries.
+
+        Retourne :
+        ----------
+        TimeSeries
+            SNR complexe assemblé, sans les `pad` secondes corrompues à chaque bord des données.
+        """
+        if strain is None:
+            strain = self.load_strain()
+        spec = self._spec(strain)
+        n = len(strain)
+        pad = int(round(self.pad / strain.delta_t))
+        seg_len = min(spec["seg_len"], n)
+        spec["seg_len"] = seg_len
+        bounds = segment_bounds(n, seg_len, pad)
+        if out is None:
+            out = np.empty(n - 2 * pad, dtype=np.complex128)
+        count("segments.segments", len(bounds))
+        count("segments.samples", len(bounds) * seg_len)
+
+        if self.processes == 1 or len(bounds) == 1:
+            data = strain.numpy()
+            for start, lo, hi in bounds:
+                out[lo - pad:hi - pad] = _filter_segment(data, start, start + seg_len, spec)[lo - start:hi - start]
+        else:
+            self._run_pool(strain, spec, bounds, out, pad)
+        return TimeSeries(out, delta_t=strain.delta_t, epoch=float(strain.start_time) + pad * strain.delta_t, copy=False)
+
+    def _source(self, strain):
+        """
+        Source des données pour les processus : le fichier du cache s'il contient exactement la
+        série (même début à un échantillon près, même pas de temps, même longueur), sinon une copie
+        en mémoire partagée.
+        """
+        if self.cache is not None:
+            meta = self.cache.find(self.event, self.detector, strain.sample_rate, strain.duration)
+            if meta is not None and _same_series(meta, strain):
+                return ("npy", meta["path"]), None
+        shm = ligo._share(strain.numpy())
+        return ("shm", shm.name, len(strain), strain.dtype), shm
+
+    def _run_pool(self, strain, spec, bounds, out, pad):
+        source, shm = self._source(strain)
+        spec["source"] = source
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_segment_worker,
+                                     initargs=(spec,)) as executor:
+                pending = set()
+                # Au plus deux segments en cours par processus.
+                for b in bounds:
+                    pending.add(executor.submit(_segment_worker, b))
+                    if len(pending) >= 2 * self.processes:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            (_, lo, hi), snr = future.result()
+                            out[lo - pad:hi - pad] = snr
+                for future in pending:
+                    (_, lo, hi), snr = future.result()
+                    out[lo - pad:hi - pad] = snr
+        finally:
+            if shm is not None:
+                ligo._release(shm)
@@ -0,0 +1,177 @@
+import numpy as np
+
+from . import correlation as co
+
+version = "1.0"
+
+TRIGGER_DTYPE = np.dtype([("position", np.int64), ("snr", np.float64)])
+
+
+def read_blocks(path, block_size=1 << 16):
+    """
+    Lit une série temporelle stockée sur disque par blocs successifs.
+
+    Description :
+    -------------
+    Les fichiers `.npy` sont ouverts en mémoire projetée (`mmap_mode="r"`) ; les autres fichiers
+    sont lus comme des flottants 64 bits bruts. Seul le bloc courant est chargé en mémoire.
+
+    Paramètres :
+    ------------
+    path : str
+        Chemin du fichier.
+    block_size : int, optionnel (défaut = 65536)
+        Nombre d'échantillons par bloc.
+
+    Retourne :
+    ----------
+    generator
+        Générateur de blocs `numpy.ndarray`.
+    """
+
+    if str(path).endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+    else:
+        data = np.memmap(path, dtype=np.float64, mode="r")
+    for start in range(0, data.size, block_size):
+        yield np.array(data[start:start + block_size], dtype=float)
+
+
+class StreamingDetector:
+    """
+    Détecteur incrémental pour des séries temporelles de longueur arbitraire.
+
+    Description :
+    -------------
+    Les données sont consommées par blocs. Les N_g derniers échantillons de chaque bloc sont
+    conservés et préfixés au bloc suivant (overlap-save), de sorte que les SNR émis sont
+    exactement ceux de la corrélation en mémoire (décalages `range(N - N_g)` sur le flux complet).
+    La mémoire utilisée ne dépend que de la taille des blocs et du modèle.
+
+    Attributs :
+    -----------
+    plan : correlation.TemplatePlan
+        Plan de corrélation du modèle (ou du filtre).
+    sigma_bruit : float
+        Écart-type de la corrélation du bruit, utilisé pour normaliser le SNR.
+    threshold : float
+        Seuil de détection, 3 comme dans `Detection`.
+    position : int
+        Position (dans le flux complet) du prochain décalage à émettre.
+    """
+
+    def __init__(self, template, sigma_bruit, threshold=3.0):
+
+        self.plan = co.TemplatePlan(template)
+        self.sigma_bruit = sigma_bruit
+        self.threshold = threshold
+        self.position = 0
+        self._buffer = np.zeros(0)
+
+    @classmethod
+    def from_detector(cls, detector, threshold=3.0):
+        """
+        Construit un détecteur à partir d'un objet `BruitBlanc` ou `BruitColore`.
+
+        Description :
+        -------------
+        Reprend le modèle (ou le filtre `fg`) de l'objet et la normalisation de son SNR,
+        calculée sur son bruit, pour que les SNR émis soient identiques à `detector.snr`.
+        Un `BruitColore` dans le domaine "frequency" est refusé (ValueError) : son SNR est blanchi
+        par la PSD de toute la série et ne peut pas être reproduit bloc par bloc.
+
+        Paramètres :
+        ------------
+        detector : BruitBlanc ou BruitColore
+            Objet dont on reprend le modèle et la normalisation (domaine temporel).
+        threshold : float, optionnel (défaut = 3.0)
+            Seuil de détection.
+
+        Retourne :
+        ----------
+        StreamingDetector
+            Le détecteur initialisé.
+        """
+
+        if getattr(detector, "domain", "time") != "time":
+            raise ValueError(f"Domaine non pris en charge en flux : {detector.domain}.")
+        plan = detector._template_plan()
+        sigma_bruit = np.std(plan.correlate(detector.bruit))
+        return cls(plan.template, sigma_bruit, threshold)
+
+    def reset(self):
+        """
+        Réinitialise le détecteur avant un nouveau flux.
+
+        Retourne :
+        ----------
+        Aucun.
+        """
+
+        self.position = 0
+        self._buffer = np.zeros(0)
+
+    def update(self, block):
+        """
+        Traite un bloc de données.
+
+        Paramètres :
+        ------------
+        block : numpy.ndarray
+            Nouveaux échantillons du flux.
+
+        Retourne :
+        ----------
+        tuple
+            `(start, snr)` : position dans le flux du premier SNR calculé, et SNR des décalages
+            devenus calculables grâce à ce bloc.
+        """
+
+        buf = np.concatenate((self._buffer, np.asarray(block, dtype=float)))
+        snr = self.plan.correlate(buf) / self.sigma_bruit
+        start = self.position
+        self.position += snr.size
+        self._buffer = buf[snr.size:]
+        return start, snr
+
+    def triggers(self, block):
+        """
+        Traite un bloc de données et retourne les déclenchements au-dessus du seuil.
+
+        Paramètres :
+        ------------
+        block : numpy.ndarray
+            Nouveaux échantillons du flux.
+
+        Retourne :
+        ----------
+        numpy.ndarray
+            Tableau structuré (`position`, `snr`) des décalages dont le SNR dépasse le seuil.
+        """
+
+        start, snr = self.update(block)
+        idx = np.flatnonzero(snr > self.threshold)
+        out = np.empty(idx.size, dtype=TRIGGER_DTYPE)
+        out["position"] = start + idx
+        out["snr"] = snr[idx]
+        return out
+
+    def run(self, blocks):
+        """
+        Parcourt un flux de blocs et émet les déclenchements au fur et à mesure.
+
+        Paramètres :
+        ------------
+        blocks : iterable
+            Générateur ou liste de blocs, par exemple `read_blocks(path)`.
+
+        Retourne :
+        ----------
+        generator
+            Générateur de tableaux de déclenchements, un par bloc non vide.
+        """
+
+        for block in blocks:
+            out = self.triggers(block)
+            if out.size:
+                yield out
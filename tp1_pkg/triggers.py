@@ -0,0 +1,117 @@
+import numpy as np
+
+version = "1.0"
+
+TRIGGER_DTYPE = np.dtype([("time", np.float64), ("snr", np.float64), ("phase", np.float64), ("template_id", np.int64)])
+
+
+def cluster(snr, threshold, window, delta_t=1.0, start_time=0.0, template_id=0):
+    """
+    Extrait les déclenchements d'une série de SNR : seuil puis regroupement par fenêtre.
+
+    Description :
+    -------------
+    Les échantillons dont le SNR dépasse le seuil sont regroupés par fenêtres de durée `window`
+    et seul le plus fort de chaque fenêtre est gardé. Un déclenchement est ensuite écarté si un
+    déclenchement plus fort se trouve à moins de `window` de lui dans une fenêtre voisine. Deux
+    signaux séparés de plus de `window` donnent ainsi deux déclenchements, et seul un tableau de
+    quelques lignes est gardé au lieu de la série complète.
+
+    Pour un SNR complexe (sortie de `matched_filter`), le seuil porte sur |SNR|. Pour un SNR réel
+    (méthodes `SNR` de BruitBlanc et BruitColore), il porte sur la valeur signée, comme la règle
+    `snr > 3` de `Detection` : les lobes négatifs ne donnent pas de déclenchement.
+
+    Paramètres :
+    ------------
+    snr : array_like
+        SNR réel ou complexe.
+    threshold : float
+        Seuil sur |SNR| (complexe) ou sur le SNR (réel).
+    window : float
+        Durée de la fenêtre de regroupement, dans l'unité de `delta_t`.
+    delta_t : float, optionnel (défaut = 1.0)
+        Pas entre deux échantillons (1 pour travailler en indices).
+    start_time : float, optionnel (défaut = 0.0)
+        Temps (ou abscisse) du premier échantillon.
+    template_id : int, optionnel (défaut = 0)
+        Numéro du modèle, recopié dans chaque déclenchement.
+
+    Retourne :
+    ----------
+    numpy.ndarray
+        Tableau structuré `TRIGGER_DTYPE` (time, snr, phase, template_id), trié par temps.
+    """
+
+    snr = np.asarray(snr)
+    amplitude = np.abs(snr) if np.iscomplexobj(snr) else snr
+    idx = np.flatnonzero(amplitude > threshold)
+    width = max(int(round(window / delta_t)), 1)
+
+    if idx.size:
+        # Le plus fort de chaque fenêtre fixe : tri par (fenêtre, amplitude décroissante).
+        bins = idx // width
+        order = np.lexsort((-amplitude[idx], bins))
+        first = np.ones(idx.size, dtype=bool)
+        first[1:] = bins[order][1:] != bins[order][:-1]
+        idx = idx[order][first]
+
+        # Un déclenchement est écarté si un voisin plus fort est à moins d'une fenêtre.
+        amp = amplitude[idx]
+        close = np.diff(idx) < width
+        keep = np.ones(idx.size, dtype=bool)
+        keep[1:] &= ~(close & (amp[:-1] > amp[1:]))
+        keep[:-1] &= ~(close & (amp[1:] >= amp[:-1]))
+        idx = idx[keep]
+
+    out = np.empty(idx.size, dtype=TRIGGER_DTYPE)
+    out["time"] = start_time + idx * delta_t
+    out["snr"] = amplitude[idx]
+    out["phase"] = np.angle(snr[idx]) if np.iscomplexobj(snr) else 0.0
+    out["template_id"] = template_id
+    return out
+
+
+def from_series(snr, threshold, window, template_id=0):
+    """
+    Extrait les déclenchements d'une série temporelle pycbc (TimeSeries).
+
+    Paramètres :
+    ------------
+    snr : TimeSeries
+        SNR complexe, par exemple `GWData.snr`.
+    threshold : float
+        Seuil sur |SNR|.
+    window : float
+        Durée de la fenêtre de regroupement (en secondes).
+    template_id : int, optionnel (défaut = 0)
+        Numéro du modèle.
+
+    Retourne :
+    ----------
+    numpy.ndarray
+        Tableau structuré `TRIGGER_DTYPE`, avec les temps GPS.
+    """
+
+    return cluster(snr.numpy(), threshold, window, snr.delta_t, float(snr.start_time), template_id)
+
+
+def concatenate(triggers):
+    """
+    Réunit les déclenchements de plusieurs modèles.
+
+    Paramètres :
+    ------------
+    triggers : iterable
+        Tableaux `TRIGGER_DTYPE`.
+
+    Retourne :
+    ----------
+    numpy.ndarray
+        Tableau unique, trié par temps.
+    """
+
+    triggers = list(triggers)
+    if not triggers:
+        return np.empty(0, dtype=TRIGGER_DTYPE)
+    out = np.concatenate(triggers)
+    return out[np.argsort(out["time"], kind="stable")]